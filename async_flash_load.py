@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from queue import Queue
+from typing import AsyncIterator, BinaryIO, Literal, Union
+
+from flash_load import FlashLoad, ProgressEvent
+
+# asyncio front end of FlashLoad. The PamirSerial flash commands are blocking,
+# so an operation runs in a thread of the board's own executor while every
+# status and progress event it reports is handed to the event loop as it
+# happens, no status polling is involved. A board never waits for a thread
+# shared with other boards, the loop's default executor is not used.
+# Cancelling the awaiting task aborts the operation.
+ASYNC_PROGRESS_INTERVAL_SEC = 0.5
+
+
+class _LoopStatusQueue(Queue):
+    # status_queue of the wrapped FlashLoad, forwards statuses to the event loop
+    def __init__(self, loop: asyncio.AbstractEventLoop, statuses: asyncio.Queue):
+        super().__init__()
+        self.loop = loop
+        self.statuses = statuses
+
+    def put(self, item, block=True, timeout=None):
+        self.loop.call_soon_threadsafe(self.statuses.put_nowait, item)
+
+
+class AsyncFlashLoad:
+    def __init__(
+        self,
+        serialport=None,
+        timeout=1.0,
+        framing: Literal["auto", "ascii", "binary"] = "auto",
+        progress_interval: float = ASYNC_PROGRESS_INTERVAL_SEC,  # seconds between progress statuses
+    ):
+        # one thread per board, the serial commands of a board are serial anyway
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="flash_load")
+        # FlashLoad probes the device capabilities, that runs in the board
+        # thread too so creating an AsyncFlashLoad never blocks the loop
+        self._flash_load_future = self._executor.submit(
+            self._create_flash_load, serialport, timeout, framing, progress_interval
+        )
+        self._statuses: asyncio.Queue = None  # statuses, None ends an operation
+        self._running = False
+
+    @staticmethod
+    def _create_flash_load(serialport, timeout, framing, progress_interval) -> FlashLoad:
+        flash_load = FlashLoad(serialport, timeout, framing=framing)
+        flash_load.progress.interval = progress_interval
+        return flash_load
+
+    @property
+    def flash_load(self) -> FlashLoad:
+        # blocks only if used before the capability probe has finished
+        return self._flash_load_future.result()
+
+    async def ready(self) -> FlashLoad:
+        # wait for the wrapped FlashLoad without blocking the loop
+        return await asyncio.wrap_future(self._flash_load_future)
+
+    async def load_bitstream_file(self, file_name: str, fpga_type="XCKU040") -> dict:
+        fl = await self.ready()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, fl.load_bitstream_file, file_name, fpga_type
+        )
+
+    async def _run_operation(self, function, *args, **kwargs) -> dict:
+        if self._running:
+            raise RuntimeError("An operation is already in progress.")
+        self._running = True
+        try:
+            fl = await self.ready()
+        except BaseException:
+            self._running = False
+            raise
+        loop = asyncio.get_running_loop()
+        for each_event in fl.events.values():
+            each_event.clear()
+        statuses = self._status_queue()
+        while not statuses.empty():
+            statuses.get_nowait()  # left over by an earlier operation
+        fl.status_queue = _LoopStatusQueue(loop, statuses)
+
+        def forward_progress(event: ProgressEvent) -> None:
+            fl.status_queue.put({"status": True, "msg": event.message, "progress": event})
+
+        fl.subscribe_progress(forward_progress)
+        future = loop.run_in_executor(self._executor, partial(function, fl, *args, **kwargs))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # leave the serial link in a known state before giving up
+            fl.events["pause"].clear()
+            fl.events["abort"].set()
+            await asyncio.wait([future])
+            logging.debug("Flash operation cancelled.")
+            raise
+        finally:
+            fl.unsubscribe_progress(forward_progress)
+            statuses.put_nowait(None)  # ends progress()
+            self._running = False
+
+    async def write_image(
+        self,
+        image_type: Literal["golden", "operation"] = "operation",
+        erase_full_region: bool = False,
+        mode: Literal["full", "delta"] = "full",
+        window_depth: int = 1,
+        verify: bool = False,
+        bulk_baudrate: int = 0,
+        burst_pages: int = 1,
+        erase_ahead: int = 0,
+        compress: bool = False,
+        journal: bool = False,
+    ) -> dict:
+        return await self._run_operation(
+            FlashLoad.write_image_to_flash,
+            image_type,
+            erase_full_region,
+            mode,
+            window_depth,
+            verify,
+            bulk_baudrate=bulk_baudrate,
+            burst_pages=burst_pages,
+            erase_ahead=erase_ahead,
+            compress=compress,
+            journal=journal,
+        )
+
+    async def read_image(
+        self,
+        image_type: Literal["golden", "operation"],
+        length: int = 0,
+        output: Union[str, BinaryIO, bytearray, memoryview] = None,
+        until_image_end: bool = False,
+        blank_sectors_to_stop: int = 2,
+        bulk_baudrate: int = 0,
+        burst_pages: int = 1,
+        journal: bool = False,
+    ) -> dict:
+        return await self._run_operation(
+            FlashLoad.read_image_from_flash,
+            image_type,
+            length,
+            output,
+            until_image_end,
+            blank_sectors_to_stop,
+            bulk_baudrate=bulk_baudrate,
+            burst_pages=burst_pages,
+            journal=journal,
+        )
+
+    async def verify_image(
+        self, image_type: Literal["golden", "operation"] = "operation"
+    ) -> dict:
+        return await self._run_operation(FlashLoad.verify_image_in_flash, image_type)
+
+    def _status_queue(self) -> asyncio.Queue:
+        # created on first use inside the event loop
+        if self._statuses is None:
+            self._statuses = asyncio.Queue()
+        return self._statuses
+
+    async def progress(self) -> AsyncIterator[dict]:
+        # statuses of the current or next operation as they are reported,
+        # ends when that operation finishes
+        statuses = self._status_queue()
+        while True:
+            status = await statuses.get()
+            if status is None:
+                return
+            yield status
+
+    def pause(self) -> None:
+        self.flash_load.set_flash_operation_pause()
+
+    def resume(self) -> None:
+        self.flash_load.set_flash_operation_resume()
+
+    def close(self) -> None:
+        # releases the board thread once a running operation has returned
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,530 @@
+import os
+import random
+import select
+import struct
+import threading
+import time
+import tty
+import zlib
+from collections import deque
+from queue import Queue
+
+from flash_load import (
+    FLASH_BAUD_REVERT_SEC,
+    FLASH_CMD_BAUD,
+    FLASH_CMD_BURST_READ,
+    FLASH_CMD_BURST_WRITE,
+    FLASH_CMD_CAPABILITIES,
+    FLASH_CMD_ECHO,
+    FLASH_CMD_PACKED_WRITE,
+    FLASH_CMD_PAGE_WRITE,
+    FLASH_CMD_SECTOR_CRC,
+    FLASH_FRAME_ACK,
+    FLASH_FRAME_BURST_READ,
+    FLASH_FRAME_BURST_WRITE,
+    FLASH_FRAME_DATA,
+    FLASH_FRAME_HEADER,
+    FLASH_FRAME_NAK,
+    FLASH_FRAME_PACKED_WRITE,
+    FLASH_FRAME_READ,
+    FLASH_FRAME_START,
+    FLASH_FRAME_WRITE,
+    FLASH_PAGE_SIZE,
+    FLASH_SECTOR_SIZE,
+    FPGA_BITSTREAM_IDCODE,
+    FPGA_BITSTREAM_SYNC_WORD,
+    FPGA_CMD_DESYNC,
+    FPGA_NOOP_WORD,
+    MCS_RECORD_DATA,
+    MCS_RECORD_EOF,
+    MCS_RECORD_LINEAR_ADDRESS,
+    build_frame,
+    crc16,
+    rle_decode,
+)
+
+# Simulated MicroBlaze flash loader for running FlashLoad without hardware,
+# either in-process through FakeMicroBlazeSerial (a pyserial-like object) or
+# for any serial client through the pseudo terminal of PtyMicroBlaze.
+# Every command line is answered with one line:
+#   .SpiFshEr 0x<addr>            -> "OK"
+#   .SpiFshWr 0x<addr> 0x<hex>    -> "ACK 0x<addr>"
+#   .SpiFshRd 0x<addr>            -> "0x<hex of the 256 byte page>"
+#   .SpiFshSr                     -> "0x<status register>", bit 0 is WIP
+#   .SpiFshWd                     -> "OK"
+# plus the optional commands of flash_load when listed in capabilities, with
+# "BIN" binary frames starting with FLASH_FRAME_START are accepted as well.
+# ASSUMPTION: the basic commands above belong to PamirSerial, whose source is
+# not part of this repository. Their names and replies are inferred from how
+# flash_load uses PamirSerial and are not a specification of the firmware,
+# pass wire_format to MicroBlazeEmulator to match a firmware that differs.
+PAMIR_SERIAL_WIRE_FORMAT = {
+    "sector_erase": ".SpiFshEr",
+    "sector_erase_reply": "OK",
+    "page_write": FLASH_CMD_PAGE_WRITE,
+    "page_write_reply": "ACK 0x{addr:08X}",
+    "page_read": ".SpiFshRd",
+    "page_read_reply": "0x{data}",  # data as hex
+    "read_status": ".SpiFshSr",
+    "read_status_reply": "0x{status:02X}",
+    "write_disable": ".SpiFshWd",
+    "write_disable_reply": "OK",
+}
+NOR_FLASH_SIZE = 0x2000000  # 32 MiB, golden and operation region
+NOR_SECTOR_ERASE_SEC = 0.15
+NOR_PAGE_PROGRAM_SEC = 0.0005
+UART_BITS_PER_BYTE = 10  # 8N1
+UART_IDLE_RESET_SEC = 0.05  # an incomplete command idle for this long is dropped
+
+
+class NorFlashModel:
+    # NOR flash content with erase/program semantics, erase sets a sector to
+    # 0xFF and program can only clear bits, both keep WIP set for their duration
+    def __init__(
+        self,
+        size: int = NOR_FLASH_SIZE,
+        sector_erase_sec: float = NOR_SECTOR_ERASE_SEC,
+        page_program_sec: float = NOR_PAGE_PROGRAM_SEC,
+        time_scale: float = 1.0,  # multiplies all simulated durations
+    ):
+        self.memory = bytearray(b"\xff") * size
+        self.sector_erase_sec = sector_erase_sec
+        self.page_program_sec = page_program_sec
+        self.time_scale = time_scale
+        self.busy_until = 0.0
+
+    def is_busy(self) -> bool:
+        return time.time() < self.busy_until
+
+    def wait_ready(self) -> None:
+        delay = self.busy_until - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def status(self) -> int:
+        return 0x01 if self.is_busy() else 0x00
+
+    def erase_sector(self, addr: int) -> None:
+        self._check_address(addr)
+        if self.is_busy():
+            raise RuntimeError("Flash busy")
+        start = addr - addr % FLASH_SECTOR_SIZE
+        self.memory[start : start + FLASH_SECTOR_SIZE] = b"\xff" * FLASH_SECTOR_SIZE
+        self.busy_until = time.time() + self.sector_erase_sec * self.time_scale
+
+    def program_page(self, addr: int, data: bytes) -> None:
+        self._check_address(addr)
+        if self.is_busy():
+            raise RuntimeError("Flash busy")
+        if len(data) > FLASH_PAGE_SIZE:
+            raise ValueError("More than one page of data")
+        page_start = addr - addr % FLASH_PAGE_SIZE
+        for idx, value in enumerate(data):
+            # addresses wrap around within the page like on the real device
+            byte_addr = page_start + (addr - page_start + idx) % FLASH_PAGE_SIZE
+            self.memory[byte_addr] &= value
+        self.busy_until = time.time() + self.page_program_sec * self.time_scale
+
+    def read(self, addr: int, length: int = FLASH_PAGE_SIZE) -> bytes:
+        self._check_address(addr + length - 1)
+        return bytes(self.memory[addr : addr + length])
+
+    def _check_address(self, addr: int) -> None:
+        if not 0 <= addr < len(self.memory):
+            raise ValueError(f"Address 0x{addr:08X} outside flash")
+
+
+class MicroBlazeEmulator:
+    # command interpreter of the MicroBlaze flash loader
+    def __init__(
+        self,
+        flash: NorFlashModel = None,
+        capabilities: tuple = ("CRC", "PIPE", "BIN", "BAUD", "BURST", "RLE"),  # () behaves like old firmware
+        baudrate: int = 230400,
+        max_baudrate: int = 3000000,  # highest rate accepted by .SpiFshBaud
+        wire_format: dict = None,  # entries replacing those of PAMIR_SERIAL_WIRE_FORMAT
+    ):
+        self.flash = flash or NorFlashModel()
+        self.wire_format = {**PAMIR_SERIAL_WIRE_FORMAT, **(wire_format or {})}
+        self.capabilities = tuple(capabilities)
+        self.baudrate = baudrate  # current UART rate
+        self.max_baudrate = max_baudrate
+        self.command_counts: dict[str, int] = {}
+        self._pending = bytearray()  # received bytes of an incomplete command
+        self._received_at = 0.0  # time of the last received bytes
+        self._baudrate_revert: tuple = None  # (rate, deadline) until the echo
+
+    def receive(self, data: bytes, baudrate: int = None) -> list[bytes]:
+        # feed bytes as received by the UART, returns the replies to send back,
+        # bytes sent at another baudrate than the UART's are lost
+        if self._baudrate_revert and time.time() > self._baudrate_revert[1]:
+            self.baudrate = self._baudrate_revert[0]
+            self._baudrate_revert = None
+        if baudrate is not None and baudrate != self.baudrate:
+            self._pending.clear()
+            return []
+        if self._pending and time.time() - self._received_at > UART_IDLE_RESET_SEC:
+            # rest of a garbled command, the firmware resynchronises on idle
+            self._pending.clear()
+        self._received_at = time.time()
+        self._pending += data
+        replies = []
+        while self._pending:
+            if self._pending[0] == FLASH_FRAME_START and "BIN" in self.capabilities:
+                frame_size = self._frame_size()
+                if frame_size is None or len(self._pending) < frame_size:
+                    break
+                frame = bytes(self._pending[:frame_size])
+                del self._pending[:frame_size]
+                replies.append(self.handle_frame(frame))
+                continue
+            line_end = self._pending.find(b"\n")
+            if line_end == -1:
+                break
+            line = bytes(self._pending[:line_end]).decode("utf-8", errors="replace")
+            del self._pending[: line_end + 1]
+            reply = self.handle_line(line)
+            if reply:
+                replies.append(bytes(f"{reply}\n", "utf-8"))
+        return replies
+
+    def _frame_size(self) -> int:
+        if len(self._pending) < FLASH_FRAME_HEADER.size:
+            return None
+        _, opcode, _, length = FLASH_FRAME_HEADER.unpack_from(self._pending)
+        payload_size = 0 if opcode in (FLASH_FRAME_READ, FLASH_FRAME_BURST_READ) else length
+        return FLASH_FRAME_HEADER.size + payload_size + 2
+
+    def handle_frame(self, frame: bytes) -> bytes:
+        _, opcode, addr, length = FLASH_FRAME_HEADER.unpack_from(frame)
+        body = frame[FLASH_FRAME_HEADER.size : -2]
+        command = f"frame {chr(opcode)}"
+        self.command_counts[command] = self.command_counts.get(command, 0) + 1
+        try:
+            if crc16(frame[1:-2]) != int.from_bytes(frame[-2:], "big"):
+                raise ValueError("CRC error")
+            if opcode == FLASH_FRAME_WRITE:
+                if "PIPE" in self.capabilities:
+                    self.flash.wait_ready()
+                self.flash.program_page(addr, body)
+                return build_frame(FLASH_FRAME_ACK, addr)
+            if opcode == FLASH_FRAME_READ:
+                return build_frame(FLASH_FRAME_DATA, addr, self.flash.read(addr, length))
+            if opcode == FLASH_FRAME_BURST_WRITE and "BURST" in self.capabilities:
+                self.program_burst(addr, body)
+                return build_frame(FLASH_FRAME_ACK, addr)
+            if opcode == FLASH_FRAME_PACKED_WRITE and "RLE" in self.capabilities:
+                self.program_burst(addr, rle_decode(body))
+                return build_frame(FLASH_FRAME_ACK, addr)
+            if opcode == FLASH_FRAME_BURST_READ and "BURST" in self.capabilities:
+                self.flash.wait_ready()
+                return build_frame(FLASH_FRAME_DATA, addr, self.flash.read(addr, length))
+            raise ValueError(f"Unknown opcode {opcode}")
+        except Exception:
+            return build_frame(FLASH_FRAME_NAK, addr)
+
+    def program_burst(self, addr: int, data: bytes) -> None:
+        # consecutive pages within one sector, acknowledged once programmed
+        if len(data) % FLASH_PAGE_SIZE or addr % FLASH_PAGE_SIZE:
+            raise ValueError("Burst not page aligned")
+        if addr // FLASH_SECTOR_SIZE != (addr + len(data) - 1) // FLASH_SECTOR_SIZE:
+            raise ValueError("Burst crosses a sector boundary")
+        for offset in range(0, len(data), FLASH_PAGE_SIZE):
+            self.flash.wait_ready()
+            self.flash.program_page(addr + offset, data[offset : offset + FLASH_PAGE_SIZE])
+        self.flash.wait_ready()
+
+    def handle_line(self, line: str) -> str:
+        fields = line.split()
+        if not fields:
+            return ""
+        command = fields[0]
+        self.command_counts[command] = self.command_counts.get(command, 0) + 1
+        wire = self.wire_format
+        try:
+            if command == wire["sector_erase"]:
+                if "PIPE" in self.capabilities:
+                    # queued behind pipelined page writes still programming
+                    self.flash.wait_ready()
+                self.flash.erase_sector(int(fields[1], 16))
+                return wire["sector_erase_reply"]
+            if command == wire["page_write"]:
+                addr = int(fields[1], 16)
+                if "PIPE" in self.capabilities:
+                    # pipelining firmware waits for the previous operation itself
+                    self.flash.wait_ready()
+                self.flash.program_page(addr, bytes.fromhex(fields[2][2:]))
+                return wire["page_write_reply"].format(addr=addr)
+            if command == wire["page_read"]:
+                return wire["page_read_reply"].format(data=self.flash.read(int(fields[1], 16)).hex())
+            if command == wire["read_status"]:
+                return wire["read_status_reply"].format(status=self.flash.status())
+            if command == wire["write_disable"]:
+                return wire["write_disable_reply"]
+            if command == FLASH_CMD_BAUD and "BAUD" in self.capabilities:
+                baudrate = int(fields[1])
+                if baudrate > self.max_baudrate:
+                    raise ValueError(f"Baud rate {baudrate} not supported")
+                # the reply still goes out at the current rate
+                self._baudrate_revert = (self.baudrate, time.time() + FLASH_BAUD_REVERT_SEC)
+                self.baudrate = baudrate
+                return f"BAUD {baudrate}"
+            if command == FLASH_CMD_ECHO and "BAUD" in self.capabilities:
+                self._baudrate_revert = None
+                return f"ECHO {' '.join(fields[1:])}"
+            if command == FLASH_CMD_BURST_WRITE and "BURST" in self.capabilities:
+                addr = int(fields[1], 16)
+                self.program_burst(addr, bytes.fromhex(fields[2][2:]))
+                return f"ACK 0x{addr:08X}"
+            if command == FLASH_CMD_PACKED_WRITE and "RLE" in self.capabilities:
+                addr = int(fields[1], 16)
+                self.program_burst(addr, rle_decode(bytes.fromhex(fields[2][2:])))
+                return f"ACK 0x{addr:08X}"
+            if command == FLASH_CMD_BURST_READ and "BURST" in self.capabilities:
+                addr = int(fields[1], 16)
+                self.flash.wait_ready()
+                return f"0x{self.flash.read(addr, int(fields[2]) * FLASH_PAGE_SIZE).hex()}"
+            if command == FLASH_CMD_CAPABILITIES and self.capabilities:
+                return " ".join(("CAP",) + self.capabilities)
+            if command == FLASH_CMD_SECTOR_CRC and "CRC" in self.capabilities:
+                addr = int(fields[1], 16)
+                self.flash.wait_ready()
+                return f"CRC 0x{zlib.crc32(self.flash.read(addr, FLASH_SECTOR_SIZE)):08X}"
+        except Exception as e:
+            return f"ERR {e}"
+        return f"ERR unknown command {command}"
+
+
+class FakeMicroBlazeSerial:
+    # in-process stand-in for serial.Serial connected to a MicroBlazeEmulator,
+    # transfers take as long as they would at baudrate. Without device_thread
+    # the emulator handles a command within write(), with it the commands are
+    # handled by a thread while the host goes on sending, like the firmware
+    # which buffers the UART input while the flash is busy.
+    def __init__(
+        self,
+        emulator: MicroBlazeEmulator = None,
+        baudrate: int = 230400,
+        timeout: float = 1.0,
+        time_scale: float = 1.0,  # multiplies the simulated transfer times
+        max_reliable_baudrate: int = 3000000,  # data sent faster is corrupted
+        device_thread: bool = False,  # emulator runs beside the host
+        glitch_rate: float = 0.0,  # chance of one corrupted byte per transfer
+        seed: int = 0,  # of the glitches
+        glitch_above_baudrate: int = 0,  # glitches only above this rate, 0 at any rate
+    ):
+        self.emulator = emulator or MicroBlazeEmulator()
+        self.baudrate = baudrate
+        self.max_reliable_baudrate = max_reliable_baudrate
+        self.timeout = timeout
+        self.time_scale = time_scale
+        self.is_open = True
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.glitch_rate = glitch_rate
+        self.glitch_above_baudrate = glitch_above_baudrate
+        self.glitches = 0
+        self._rng = random.Random(seed)
+        self._tx = deque()  # bytes objects waiting to be read by the host
+        self._received: Queue = None  # (data, baudrate) for the device thread
+        self._replied: threading.Condition = None
+        if device_thread:
+            self._received = Queue()
+            self._replied = threading.Condition()
+            threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self) -> None:
+        while True:
+            received = self._received.get()
+            if received is None:
+                return
+            replies = self.emulator.receive(*received)
+            with self._replied:
+                self._tx.extend(self._glitch(reply) for reply in replies)
+                self._replied.notify_all()
+
+    def _glitch(self, data: bytes) -> bytes:
+        # a bit error in one byte, as a noisy UART line causes now and then
+        if not data or self.baudrate <= self.glitch_above_baudrate:
+            return data
+        if self._rng.random() >= self.glitch_rate:
+            return data
+        self.glitches += 1
+        data = bytearray(data)
+        data[self._rng.randrange(len(data))] ^= 1 << self._rng.randrange(8)
+        return bytes(data)
+
+    def _wait_reply(self) -> None:
+        # up to timeout, replies only arrive meanwhile from the device thread
+        if self._replied is None:
+            if self.timeout:
+                time.sleep(self.timeout)
+            return
+        with self._replied:
+            self._replied.wait_for(lambda: self._tx, self.timeout)
+
+    def _transfer_delay(self, count: int) -> None:
+        if self.time_scale:
+            time.sleep(count * UART_BITS_PER_BYTE / self.baudrate * self.time_scale)
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._transfer_delay(len(data))
+        self.bytes_written += len(data)
+        if self.baudrate > self.max_reliable_baudrate:
+            data = bytes(byte ^ 0x10 for byte in data)  # bit errors on the line
+        data = self._glitch(data)
+        if self._received is not None:
+            self._received.put((data, self.baudrate))
+        else:
+            replies = self.emulator.receive(data, self.baudrate)
+            self._tx.extend(self._glitch(reply) for reply in replies)
+        return len(data)
+
+    @property
+    def in_waiting(self) -> int:
+        return sum(len(chunk) for chunk in self._tx)
+
+    def read(self, size: int = 1) -> bytes:
+        data = bytearray()
+        if not self._tx:
+            self._wait_reply()
+        while self._tx and len(data) < size:
+            chunk = self._tx.popleft()
+            take = size - len(data)
+            data += chunk[:take]
+            if len(chunk) > take:
+                self._tx.appendleft(chunk[take:])
+        self._transfer_delay(len(data))
+        self.bytes_read += len(data)
+        return bytes(data)
+
+    def readline(self) -> bytes:
+        if not self._tx:
+            self._wait_reply()
+            if not self._tx:
+                return b""
+        line = self._tx.popleft()
+        self._transfer_delay(len(line))
+        self.bytes_read += len(line)
+        return line
+
+    def reset_input_buffer(self) -> None:
+        self._tx.clear()
+
+    def reset_output_buffer(self) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.is_open = False
+        if self._received is not None:
+            self._received.put(None)
+
+
+class PtyMicroBlaze:
+    # serves a MicroBlazeEmulator on a pseudo terminal, open port_name with
+    # serial.Serial to talk to it like to the board
+    def __init__(self, emulator: MicroBlazeEmulator = None):
+        self.emulator = emulator or MicroBlazeEmulator()
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)  # no echo or line editing, like a UART
+        self.port_name = os.ttyname(self.slave_fd)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def start(self) -> str:
+        self._thread.start()
+        return self.port_name
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+    def _serve(self) -> None:
+        while not self._stop.is_set():
+            readable, _, _ = select.select([self.master_fd], [], [], 0.1)
+            if not readable:
+                continue
+            for reply in self.emulator.receive(os.read(self.master_fd, 4096)):
+                os.write(self.master_fd, reply)
+
+
+def make_test_bitstream(
+    size: int,
+    blank_ratio: float = 0.0,  # fraction of the frame data made of blank pages
+    fpga_type: str = "XCKU040",
+    seed: int = 0,
+    zero_ratio: float = 0.0,  # about this fraction of the frame data is zero words
+) -> bytes:
+    # synthetic bitstream with header, sync word, IDCODE, FDRI frames and
+    # DESYNC, accepted by FlashLoad.load_bitstream_file
+    rng = random.Random(seed)
+
+    def words(*values) -> bytes:
+        return b"".join(struct.pack(">I", value) for value in values)
+
+    header = b"\xff" * 64 + words(
+        0x000000BB,
+        0x11220044,
+        0xFFFFFFFF,
+        int(FPGA_BITSTREAM_SYNC_WORD, 16),
+        FPGA_NOOP_WORD,
+        0x30018001,  # write IDCODE register
+        int(FPGA_BITSTREAM_IDCODE[fpga_type], 16),
+        0x30004000,  # write FDRI, word count in the type 2 packet
+    )
+    trailer = words(0x30008001, FPGA_CMD_DESYNC) + words(*[FPGA_NOOP_WORD] * 16)
+    frame_words = max(size - len(header) - 4 - len(trailer), 0) // 4
+    frames = bytearray(rng.getrandbits(frame_words * 32).to_bytes(frame_words * 4, "big"))
+    zero_bytes = int(len(frames) * zero_ratio)
+    while zero_bytes > 0:
+        # frames of unused resources are zero, in runs of up to a few pages
+        length = min(rng.randrange(4, 4 * FLASH_PAGE_SIZE, 4), zero_bytes)
+        start = rng.randrange(0, len(frames) - length + 1, 4)
+        frames[start : start + length] = bytes(length)
+        zero_bytes -= length
+    # blank pages are aligned to the flash pages of the whole image
+    first_page_offset = -(len(header) + 4) % FLASH_PAGE_SIZE
+    page_offsets = range(first_page_offset, len(frames) - FLASH_PAGE_SIZE, FLASH_PAGE_SIZE)
+    for offset in rng.sample(page_offsets, int(len(page_offsets) * blank_ratio)):
+        frames[offset : offset + FLASH_PAGE_SIZE] = b"\xff" * FLASH_PAGE_SIZE
+    return header + words(0x50000000 | frame_words) + bytes(frames) + trailer
+
+
+def make_bit_file(
+    image: bytes, design: str = "flash_load_test", part: str = "xcku040-ffva1156-2-e"
+) -> bytes:
+    # Xilinx .bit file of an image, as written by write_bitstream
+    def field(key: bytes, value: str) -> bytes:
+        text = value.encode() + b"\0"
+        return key + struct.pack(">H", len(text)) + text
+
+    header = struct.pack(">H", 9) + bytes.fromhex("0ff00ff00ff00ff000") + struct.pack(">H", 1)
+    header += field(b"a", design) + field(b"b", part)
+    header += field(b"c", "2026/01/01") + field(b"d", "00:00:00")
+    return header + b"e" + struct.pack(">I", len(image)) + image
+
+
+def make_mcs_file(image: bytes, address: int = 0, record_size: int = 16) -> str:
+    # Intel HEX (.mcs) text of an image placed at address, as written by write_cfgmem
+    def record(record_type: int, offset: int, data: bytes) -> str:
+        body = bytes([len(data)]) + struct.pack(">H", offset) + bytes([record_type]) + data
+        return f":{(body + bytes([-sum(body) & 0xFF])).hex().upper()}\n"
+
+    lines = []
+    upper = None
+    for offset in range(0, len(image), record_size):
+        target = address + offset
+        if target >> 16 != upper:
+            upper = target >> 16
+            lines.append(record(MCS_RECORD_LINEAR_ADDRESS, 0, struct.pack(">H", upper)))
+        lines.append(
+            record(MCS_RECORD_DATA, target & 0xFFFF, image[offset : offset + record_size])
+        )
+    lines.append(record(MCS_RECORD_EOF, 0, b""))
+    return "".join(lines)
@@ -1,11 +1,25 @@
 import time
 import os
+import heapq
+import inspect
+import re
 import sys
+import csv
+import json
+import bisect
+import zlib
+import base64
+import hashlib
+import struct
+import binascii
 import serial
 import logging
-from typing import Literal
-from threading import Event, Thread
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Literal, Union
+from threading import Event, Lock, Thread
 from queue import Queue
+from collections import OrderedDict
 
 from serialcommport.Pamir_serial_basic import PamirSerial
 
@@ -18,19 +32,684 @@ FLASH_ADDRBASE_OPERATION = 0x01000000
 IMAGE_MAX_SIZE_BYTES = FLASH_ADDRBASE_OPERATION
 FLASH_WIP_TIMEOUT_SEC = 10.0
 FLASH_POLL_INTERVAL_SEC = 0.001
+# typical WIP durations used before the first status poll, refined during a run
+FLASH_WIP_EXPECTED_SEC = {
+    "erase": 0.15,  # 64 KiB sector erase
+    "program": 0.0005,  # 256 byte page program
+}
+FLASH_WIP_FIRST_POLL_FRACTION = 0.8  # first poll at this fraction of the expected time
+FLASH_WIP_LEARN_RATE = 0.2  # weight of the latest observation in the expected time
+# a failed page, erase or CRC command is retried up to FlashLoad.retries times
+# after resynchronising the serial link, the wait before a retry starts at
+# FLASH_RETRY_BACKOFF_SEC and doubles on every attempt
+FLASH_RETRIES = 3
+FLASH_RETRY_BACKOFF_SEC = 0.1
+FLASH_RESYNC_QUIET_SEC = 0.02  # no input for this long ends draining the link
+FLASH_PROGRESS_INTERVAL_SEC = 0.2  # minimum time between published progress events
+FLASH_PROGRESS_MESSAGES = {
+    "compare": "Compare: checking sector",
+    "erase": "Erasing sector",
+    "write": "Writing page",
+    "verify": "Verify: checking sector",
+    "read": "Reading page",
+}
+# upper bounds of the command latency histogram buckets, 0.125 ms to 8 s
+INSTRUMENT_BUCKETS_MS = tuple(2.0**k for k in range(-3, 14))
+# status polls happen within wip_wait and pipelined acks overlap other
+# commands, both are left out of the command time of a phase
+INSTRUMENT_OVERLAPPING_COMMANDS = ("status", "ack")
 FPGA_BITSTREAM_SYNC_WORD = (
     "AA995566"  # 4 bytes sync word at the start of the bitstream file
 )
+FPGA_CMD_REGISTER = 0x04  # configuration packet register address of CMD
+FPGA_CMD_DESYNC = 0x0D  # CMD register code ending the configuration
+FPGA_NOOP_WORD = 0x20000000  # type 1 NOOP packet
 FPGA_BITSTREAM_IDCODE = {
     "XCKU040": "3822093"  # Expected IDCODE for the FPGA
 }
-ALLOW_EXTS = [".bin"]
+ALLOW_EXTS = [".bin", ".bit", ".mcs"]
+# .bit header: length prefixed magic, then fields "a" to "d" (design, part,
+# date, time) with a 2 byte length and the configuration data as field "e"
+BIT_FILE_TEXT_FIELDS = b"abcd"
+BIT_FILE_DATA_FIELD = b"e"
+IMAGE_FILE_CHUNK_SIZE = 1024 * 1024  # bytes decoded at a time from .bit files
+# Intel HEX record types of .mcs files
+MCS_RECORD_DATA = 0x00
+MCS_RECORD_EOF = 0x01
+MCS_RECORD_SEGMENT_ADDRESS = 0x02
+MCS_RECORD_LINEAR_ADDRESS = 0x04
+# parsed bitstreams kept in memory by BitstreamCache, least recently used first out
+FLASH_CACHE_MAX_BYTES = 64 * 1024 * 1024
+FLASH_CACHE_INDEX_ENTRIES = 32  # entries kept in the optional on-disk index
+FLASH_BLANK_PAGE = b"\xff" * FLASH_PAGE_SIZE  # erased page content
+FLASH_BLANK_SECTOR_CRC = zlib.crc32(b"\xff" * FLASH_SECTOR_SIZE)
+# checkpoints of journaled write and read operations, kept until the operation
+# completes so resume_flash_operation can continue after a reboot or link loss
+FLASH_JOURNAL_FILE = "flash_load_journal.json"
+# operations accepted by submit_flash_jobs, run back to back by one worker
+FLASH_JOB_OPERATIONS = ("write", "read", "verify")
+# MicroBlaze commands beyond the ones provided by PamirSerial, only used when
+# advertised in the reply to FLASH_CMD_CAPABILITIES, e.g. "CAP CRC"
+FLASH_CMD_CAPABILITIES = ".SpiFshCap"
+FLASH_CMD_SECTOR_CRC = ".SpiFshCrc"  # reply "CRC 0x<crc32 of the 64 KiB sector>"
+# page program command as sent by PamirSerial.flash_write, with "PIPE" the
+# firmware waits for WIP itself and acknowledges every page with "ACK 0x<addr>"
+FLASH_CMD_PAGE_WRITE = ".SpiFshWr"
+# with "BURST" up to a sector of consecutive pages is written or read with one
+# command, the firmware splits it into pages, waits for WIP after each one and
+# acknowledges a burst write with "ACK 0x<addr>" once all pages are programmed
+FLASH_CMD_BURST_WRITE = ".SpiFshWrB"  # 0x<addr> 0x<hex of the pages>
+FLASH_CMD_BURST_READ = ".SpiFshRdB"  # 0x<addr> <pages>, reply "0x<hex of the pages>"
+FLASH_MAX_BURST_PAGES = FLASH_SECTOR_SIZE // FLASH_PAGE_SIZE
+# with "RLE" consecutive pages of a sector can be sent PackBits compressed
+# (rle_encode), the firmware expands them and programs them like a burst
+FLASH_CMD_PACKED_WRITE = ".SpiFshWrZ"  # 0x<addr> 0x<hex of the packed pages>
+FLASH_RLE_RUN = re.compile(rb"(.)\1{2,}", re.DOTALL)  # shorter repeats stay literal
+FLASH_RLE_MAX_COUNT = 128  # bytes per literal block or repeat
+# runtime baud rate change when the firmware advertises "BAUD": the MicroBlaze
+# replies "BAUD <rate>" at the current rate and switches, then the link is
+# checked by echoing a test pattern. Without a valid echo within
+# FLASH_BAUD_REVERT_SEC the firmware goes back to the previous rate.
+FLASH_CMD_BAUD = ".SpiFshBaud"
+FLASH_CMD_ECHO = ".SpiFshEcho"  # reply "ECHO <argument>"
+FLASH_BAUD_RATES = (3000000, 2000000, 1500000, 1000000, 921600, 460800)
+FLASH_BAUD_TEST_PATTERN = bytes(range(256)).hex()
+FLASH_BAUD_REVERT_SEC = 0.5
+# failed attempts of one command at a raised rate before the transfer goes on
+# at the next lower rate
+FLASH_BAUD_STEP_DOWN_FAILURES = 2
+# binary framing used instead of the ASCII hex lines when the firmware
+# advertises "BIN": start byte, opcode, address, payload length, payload and
+# CRC-16/CCITT-FALSE over opcode to payload, replies are framed the same way
+FLASH_FRAME_START = 0xA5
+FLASH_FRAME_HEADER = struct.Struct(">BBII")  # start, opcode, address, length
+FLASH_FRAME_WRITE = ord("W")  # payload to program, replied with ACK
+FLASH_FRAME_READ = ord("R")  # no payload, length to read, replied with DATA
+FLASH_FRAME_BURST_WRITE = ord("B")  # pages to program, replied with ACK when done
+FLASH_FRAME_BURST_READ = ord("Q")  # no payload, length to read, replied with DATA
+FLASH_FRAME_PACKED_WRITE = ord("Z")  # packed pages, replied with ACK when done
+FLASH_FRAME_BODY_TIMEOUT_SEC = 1.0  # for a reply body, plus its transfer time
+FLASH_FRAME_ACK = ord("A")
+FLASH_FRAME_NAK = ord("N")
+FLASH_FRAME_DATA = ord("D")
+
+
+def crc16(data, crc: int = 0xFFFF) -> int:
+    # CRC-16/CCITT-FALSE of the binary frames, pass crc to continue a CRC
+    return binascii.crc_hqx(data, crc)
+
+
+def rle_encode(data) -> bytes:
+    # PackBits, a control byte n below 128 is followed by n + 1 literal bytes,
+    # above 128 by one byte repeated 257 - n times
+    packed = bytearray()
+
+    def literals(start: int, end: int) -> None:
+        for block in range(start, end, FLASH_RLE_MAX_COUNT):
+            chunk = data[block : min(block + FLASH_RLE_MAX_COUNT, end)]
+            packed.append(len(chunk) - 1)
+            packed.extend(chunk)
+
+    literal_start = 0
+    for run in FLASH_RLE_RUN.finditer(data):
+        literals(literal_start, run.start())
+        remaining = run.end() - run.start()
+        while remaining:
+            count = min(remaining, FLASH_RLE_MAX_COUNT)
+            if count == 1:
+                packed.append(0)  # a single byte left of a long run
+            else:
+                packed.append(257 - count)
+            packed.extend(run.group(1))
+            remaining -= count
+        literal_start = run.end()
+    literals(literal_start, len(data))
+    return bytes(packed)
+
+
+def rle_decode(packed) -> bytes:
+    data = bytearray()
+    idx = 0
+    while idx < len(packed):
+        control = packed[idx]
+        idx += 1
+        if control < 128:
+            if idx + control + 1 > len(packed):
+                raise ValueError("Truncated literal block")
+            data += packed[idx : idx + control + 1]
+            idx += control + 1
+        elif control > 128:
+            if idx >= len(packed):
+                raise ValueError("Truncated repeat")
+            data += packed[idx : idx + 1] * (257 - control)
+            idx += 1
+    return bytes(data)
+
+
+def build_frame(opcode: int, address: int, payload=b"", length: int = None) -> bytes:
+    header = FLASH_FRAME_HEADER.pack(
+        FLASH_FRAME_START, opcode, address, len(payload) if length is None else length
+    )
+    crc = crc16(payload, crc16(header[1:]))
+    return header + bytes(payload) + crc.to_bytes(2, "big")
+
+
+class WipWaiter:
+    # Waits for the flash write-in-progress bit to clear. The first status poll
+    # is delayed to the expected duration of the operation and later polls back
+    # off exponentially, the expected duration follows the observed ones.
+    def __init__(self, read_status, expected_sec: dict = None):
+        self.read_status = read_status
+        self.expected_sec = dict(expected_sec or FLASH_WIP_EXPECTED_SEC)
+        self.poll_histogram: dict[str, dict[int, int]] = {}
+
+    def reset_histogram(self) -> None:
+        self.poll_histogram = {operation: {} for operation in self.expected_sec}
+
+    def wait(
+        self,
+        operation: Literal["erase", "program"],
+        issued_at: float,  # time.time() when the operation command was sent
+        timeout: float = FLASH_WIP_TIMEOUT_SEC,
+    ) -> int:
+        expected = self.expected_sec[operation]
+        first_poll_delay = expected * FLASH_WIP_FIRST_POLL_FRACTION - (
+            time.time() - issued_at
+        )
+        if first_poll_delay > 0:
+            time.sleep(first_poll_delay)
+        interval = max(FLASH_POLL_INTERVAL_SEC, expected / 16)
+        max_interval = max(FLASH_POLL_INTERVAL_SEC, expected / 4)
+        polls = 1
+        while self.read_status() & 0x01:  # check flash status
+            if time.time() - issued_at > timeout:
+                raise TimeoutError(f"Flash busy > {timeout:.0f} s during {operation}")
+            time.sleep(interval)
+            interval = min(interval * 2, max_interval)
+            polls += 1
+        elapsed = time.time() - issued_at
+        self.expected_sec[operation] = (
+            1 - FLASH_WIP_LEARN_RATE
+        ) * expected + FLASH_WIP_LEARN_RATE * elapsed
+        histogram = self.poll_histogram.setdefault(operation, {})
+        histogram[polls] = histogram.get(polls, 0) + 1
+        return polls
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    phase: str  # key of FLASH_PROGRESS_MESSAGES
+    done: int  # pages or sectors finished in this phase
+    total: int
+    unit_bytes: int  # bytes per page or sector
+    address: int  # flash address being processed
+    bytes_per_sec: float
+    eta_sec: float  # None until a rate is known
+    started_at: float  # time.time() at the start of the phase
+    timestamp: float
+
+    @property
+    def message(self) -> str:
+        return (
+            f"{FLASH_PROGRESS_MESSAGES[self.phase]} {min(self.done + 1, self.total)}"
+            f"/{self.total} at 0x{self.address:08X}"
+        )
+
+
+class ProgressPublisher:
+    # Tracks the position of the running phase with a couple of attribute
+    # stores per page, ProgressEvent objects and messages are only built when
+    # a subscriber is due for an event, on request or with debug logging on.
+    def __init__(self, interval: float = FLASH_PROGRESS_INTERVAL_SEC):
+        self.interval = interval
+        self.subscribers: tuple = ()
+        self.phase = None
+        self.done = 0
+        self.total = 0
+        self.unit_bytes = 0
+        self.address = 0
+        self.started_at = 0.0
+        self.debug = False
+        self._start_done = 0
+        self._next_publish = 0.0
+
+    def subscribe(self, callback) -> None:
+        # callback(ProgressEvent), called from the operation thread
+        self.subscribers += (callback,)
+
+    def unsubscribe(self, callback) -> None:
+        self.subscribers = tuple(cb for cb in self.subscribers if cb != callback)
+
+    def start(self, phase: str, total: int, unit_bytes: int, done: int = 0) -> None:
+        self.phase = phase
+        self.total = total
+        self.unit_bytes = unit_bytes
+        self.done = self._start_done = done
+        self.started_at = time.time()
+        self.debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        self._next_publish = 0.0  # first update of a phase is published
+
+    def update(self, done: int, address: int) -> None:
+        self.done = done
+        self.address = address
+        if self.debug:
+            logging.debug(self.event().message)
+        if self.subscribers and time.monotonic() >= self._next_publish:
+            self.publish()
+
+    def finish(self) -> None:
+        self.done = self.total
+        if self.subscribers:
+            self.publish()
+
+    def event(self) -> ProgressEvent:
+        now = time.time()
+        elapsed = now - self.started_at
+        units_per_sec = (self.done - self._start_done) / elapsed if elapsed > 0 else 0.0
+        return ProgressEvent(
+            phase=self.phase,
+            done=self.done,
+            total=self.total,
+            unit_bytes=self.unit_bytes,
+            address=self.address,
+            bytes_per_sec=round(units_per_sec * self.unit_bytes, 1),
+            eta_sec=(
+                round((self.total - self.done) / units_per_sec, 1) if units_per_sec else None
+            ),
+            started_at=self.started_at,
+            timestamp=now,
+        )
+
+    def publish(self) -> None:
+        self._next_publish = time.monotonic() + self.interval
+        event = self.event()
+        for callback in self.subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logging.error(f"Progress subscriber failed: {e}")
+
+
+class Instrumentation:
+    # Optional per-command latency histograms, counters and phase timing of
+    # one operation, with an optional trace of every command. Disabled, every
+    # hook returns right away.
+    def __init__(self, enabled: bool = False, trace_file: str = None):
+        self.enabled = enabled
+        self.trace_file = trace_file  # .csv or .json, written after each operation
+        self.reset()
+
+    def reset(self) -> None:
+        self.started = time.perf_counter()
+        self.phase = "setup"  # commands before the first phase
+        self.phases: dict[str, dict] = {}
+        self.counters: dict[str, int] = {}
+        self.trace: list[tuple] = []
+        self._phase_started = self.started
+
+    def begin_phase(self, phase: str) -> None:
+        if not self.enabled:
+            return
+        self.end_phase()
+        self.phase = phase
+
+    def end_phase(self) -> None:
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        stats = self._phase_stats(self.phase)
+        stats["wall_sec"] += now - self._phase_started
+        self._phase_started = now
+        self.phase = "other"  # between phases
+
+    def _phase_stats(self, phase: str) -> dict:
+        return self.phases.setdefault(phase, {"wall_sec": 0.0, "commands": {}})
+
+    def record(self, command: str, duration: float, address: int = None) -> None:
+        # duration in seconds of one command, from sending to its reply
+        if not self.enabled:
+            return
+        commands = self._phase_stats(self.phase)["commands"]
+        stats = commands.get(command)
+        if stats is None:
+            stats = commands[command] = {
+                "count": 0,
+                "total_sec": 0.0,
+                "max_sec": 0.0,
+                "buckets": [0] * (len(INSTRUMENT_BUCKETS_MS) + 1),
+            }
+        stats["count"] += 1
+        stats["total_sec"] += duration
+        stats["max_sec"] = max(stats["max_sec"], duration)
+        stats["buckets"][bisect.bisect_left(INSTRUMENT_BUCKETS_MS, duration * 1000)] += 1
+        if self.trace_file:
+            self.trace.append(
+                (time.perf_counter() - self.started, self.phase, command, address, duration)
+            )
+
+    def count(self, counter: str, increment: int = 1) -> None:
+        if self.enabled:
+            self.counters[counter] = self.counters.get(counter, 0) + increment
+
+    def summary(self) -> dict:
+        self.end_phase()
+        phases = {}
+        for phase, stats in self.phases.items():
+            command_sec = sum(
+                c["total_sec"]
+                for command, c in stats["commands"].items()
+                if command not in INSTRUMENT_OVERLAPPING_COMMANDS
+            )
+            phases[phase] = {
+                "wall_sec": round(stats["wall_sec"], 4),
+                "command_sec": round(command_sec, 4),
+                # host side time outside of commands, e.g. Python overhead
+                "other_sec": round(max(stats["wall_sec"] - command_sec, 0.0), 4),
+                "commands": {
+                    command: {
+                        "count": c["count"],
+                        "total_sec": round(c["total_sec"], 4),
+                        "mean_ms": round(c["total_sec"] * 1000 / c["count"], 3),
+                        "max_ms": round(c["max_sec"] * 1000, 3),
+                        "histogram_ms": {
+                            (
+                                f"<={INSTRUMENT_BUCKETS_MS[idx]:g}"
+                                if idx < len(INSTRUMENT_BUCKETS_MS)
+                                else f">{INSTRUMENT_BUCKETS_MS[-1]:g}"
+                            ): bucket
+                            for idx, bucket in enumerate(c["buckets"])
+                            if bucket
+                        },
+                    }
+                    for command, c in stats["commands"].items()
+                },
+            }
+        return {
+            "wall_sec": round(time.perf_counter() - self.started, 4),
+            "phases": phases,
+            "counters": dict(self.counters),
+        }
+
+    def dump_trace(self) -> None:
+        fields = ["time_sec", "phase", "command", "address", "duration_ms"]
+        rows = [
+            [round(t, 6), phase, command, address, round(duration * 1000, 3)]
+            for t, phase, command, address, duration in self.trace
+        ]
+        with open(self.trace_file, "w", newline="") as f:
+            if self.trace_file.lower().endswith(".csv"):
+                writer = csv.writer(f)
+                writer.writerow(fields)
+                writer.writerows(rows)
+            else:
+                json.dump([dict(zip(fields, row)) for row in rows], f)
+
+
+class BitstreamCache:
+    # Parsed bitstreams keyed by file path, mtime, size and FPGA type. The
+    # memory cache holds the image with its blank page map, sector digests and
+    # header offsets, bounded by max_bytes of image data. The optional on-disk
+    # index keeps everything but the image, so after a restart the file only
+    # has to be read, not scanned and hashed again.
+    def __init__(self, max_bytes: int = FLASH_CACHE_MAX_BYTES, index_file: str = None):
+        self.max_bytes = max_bytes
+        self.index_file = index_file
+        self.entries: OrderedDict = OrderedDict()  # key -> entry, oldest first
+        self.cached_bytes = 0
+        self.lock = Lock()  # loads may run in several threads
+
+    @staticmethod
+    def file_key(file_name: str, fpga_type: str) -> tuple:
+        stat = os.stat(file_name)
+        return (os.path.abspath(file_name), stat.st_mtime_ns, stat.st_size, fpga_type)
+
+    def get(self, key: tuple) -> dict:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, entry: dict) -> None:
+        # entry with the read-only "bitstream" view and its parsed data
+        size = len(entry["bitstream"])
+        with self.lock:
+            if key in self.entries or size > self.max_bytes:
+                return
+            self.entries[key] = entry
+            self.cached_bytes += size
+            while self.cached_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.cached_bytes -= len(evicted["bitstream"])
+        if self.index_file:
+            try:
+                self._store_index(key, entry)
+            except Exception as e:
+                logging.error(f"Bitstream cache index update failed: {e}")
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.cached_bytes = 0
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self.index_file) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def get_index(self, key: tuple) -> dict:
+        # parsed data of the on-disk index, without the image
+        if not self.index_file:
+            return None
+        try:
+            with self.lock:
+                record = self._read_index().get("|".join(map(str, key)))
+            if record is None:
+                return None
+            return {
+                "blank_pages": zlib.decompress(base64.b64decode(record["blank_pages"])),
+                "sector_digests": tuple(record["sector_digests"]),
+                "sha256": record["sha256"],
+                "sync_offset": record["sync_offset"],
+                "idcode_offset": record["idcode_offset"],
+            }
+        except Exception as e:
+            logging.error(f"Bitstream cache index read failed: {e}")
+            return None
+
+    def _store_index(self, key: tuple, entry: dict) -> None:
+        with self.lock:
+            index = self._read_index()
+            index_key = "|".join(map(str, key))
+            index.pop(index_key, None)  # most recent last
+            index[index_key] = {
+                "blank_pages": base64.b64encode(zlib.compress(entry["blank_pages"])).decode(),
+                "sector_digests": list(entry["sector_digests"]),
+                "sha256": entry["sha256"],
+                "sync_offset": entry["sync_offset"],
+                "idcode_offset": entry["idcode_offset"],
+            }
+            while len(index) > FLASH_CACHE_INDEX_ENTRIES:
+                index.pop(next(iter(index)))
+            tmp_file = f"{self.index_file}.tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(index, f)
+            os.replace(tmp_file, self.index_file)
+
+
+# shared by all FlashLoad instances unless one is given
+BITSTREAM_CACHE = BitstreamCache()
+
+
+class BitstreamBuilder:
+    # Assembles the flash image from chunks decoded out of a .bit or .mcs
+    # file. Gaps are filled with 0xFF and the sync word and IDCODE are looked
+    # up in each new chunk as it arrives, so the file is only passed once.
+    def __init__(self, fpga_type: str):
+        self.buffer = bytearray()
+        self.markers = {
+            "sync_offset": bytes.fromhex(FPGA_BITSTREAM_SYNC_WORD),
+            "idcode_offset": bytes.fromhex(FPGA_BITSTREAM_IDCODE[fpga_type].zfill(8)),
+        }
+        self.offsets = {}  # marker name -> image offset once found
+        self.scanned = 0  # image bytes searched for the markers so far
+
+    def write(self, offset: int, data: bytes) -> None:
+        end = offset + len(data)
+        if end > IMAGE_MAX_SIZE_BYTES:
+            raise ValueError(
+                f"Image too large ({end} bytes). Max allowed is {IMAGE_MAX_SIZE_BYTES} bytes."
+            )
+        if offset > len(self.buffer):
+            self.buffer += b"\xff" * (offset - len(self.buffer))
+        self.buffer[offset:end] = data
+        if offset < self.scanned:
+            # overwrites what was searched already, search it again
+            self.scanned = offset
+            self.offsets = {
+                name: found for name, found in self.offsets.items() if found < offset
+            }
+        self._scan()
+
+    def _scan(self) -> None:
+        for name, marker in self.markers.items():
+            if name not in self.offsets:
+                # a marker may straddle the previous chunk
+                found = self.buffer.find(marker, max(self.scanned - len(marker) + 1, 0))
+                if found != -1:
+                    self.offsets[name] = found
+        self.scanned = len(self.buffer)
+
+    def finish(self) -> dict:
+        # image padded with 0xFF to full pages and the marker offsets, -1 if missing
+        self.buffer += b"\xff" * (-len(self.buffer) % FLASH_PAGE_SIZE)
+        return_dict = {"data": self.buffer}
+        for name in self.markers:
+            return_dict[name] = self.offsets.get(name, -1)
+        return return_dict
+
+
+class BitstreamEndFinder:
+    # Incrementally parses the configuration packets of a Xilinx bitstream fed
+    # in arbitrary chunks, the image ends after the DESYNC command and the NOOP
+    # words following it. Packet payloads, e.g. the FDRI frames, are skipped.
+    def __init__(self):
+        self.pending = bytearray()  # bytes fed but not parsed yet
+        self.offset = 0  # image offset of the first pending byte
+        self.state: Literal["sync", "packet", "noop", "done", "invalid"] = "sync"
+        self.skip_bytes = 0
+        self.command_follows = False
+        self.end: int = None
+
+    def feed(self, data) -> int:
+        # returns the image length once it is known, None before that
+        if self.state in ["done", "invalid"]:
+            return self.end
+        self.pending += data
+        while True:
+            if self.skip_bytes:
+                skipped = min(self.skip_bytes, len(self.pending))
+                self._consume(skipped)
+                self.skip_bytes -= skipped
+                if self.skip_bytes:
+                    return None
+            if self.state == "sync":
+                sync_idx = self.pending.find(bytes.fromhex(FPGA_BITSTREAM_SYNC_WORD))
+                if sync_idx == -1:
+                    # keep a possible partial sync word at the end
+                    self._consume(max(len(self.pending) - 3, 0))
+                    return None
+                self._consume(sync_idx + 4)
+                self.state = "packet"
+                continue
+            if len(self.pending) < 4:
+                return None
+            word = int.from_bytes(self.pending[:4], "big")
+            if self.state == "noop":
+                if word != FPGA_NOOP_WORD:
+                    self.end = self.offset
+                    self.state = "done"
+                    return self.end
+            elif self.command_follows:
+                self.command_follows = False
+                if word == FPGA_CMD_DESYNC:
+                    self.state = "noop"
+            elif word >> 29 == 1:  # type 1 packet
+                word_count = word & 0x7FF
+                if (word >> 27) & 0x3 == 2 and (word >> 13) & 0x1F == FPGA_CMD_REGISTER:
+                    self.command_follows = word_count == 1
+                    word_count -= 1 if self.command_follows else 0
+                self.skip_bytes = word_count * 4
+            elif word >> 29 == 2:  # type 2 packet
+                self.skip_bytes = (word & 0x07FFFFFF) * 4
+            else:
+                self.state = "invalid"
+                return None
+            self._consume(4)
+
+    def _consume(self, count: int) -> None:
+        del self.pending[:count]
+        self.offset += count
+
+
+@dataclass
+class FlashJob:
+    job_id: int
+    operation: str  # one of FLASH_JOB_OPERATIONS
+    image_type: str
+    options: dict  # keyword arguments of the operation
+    priority: int = 0  # lower runs first, equal priorities in submission order
+    stop_on_failure: bool = True  # cancel the queued jobs if this one fails
+    state: str = "queued"  # "running", "done", "failed" or "cancelled"
+    cancel_requested: bool = False
+    result: dict = None  # final status dictionary of the operation
+    queued_at: float = 0.0
+    started_at: float = None
+    finished_at: float = None
+
+    def summary(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "operation": self.operation,
+            "image_type": self.image_type,
+            "priority": self.priority,
+            "state": self.state,
+            "status": self.result["status"] if self.result else None,
+            "msg": self.result["msg"] if self.result else None,
+            "wait_sec": round((self.started_at or time.time()) - self.queued_at, 3),
+            "run_sec": (
+                round((self.finished_at or time.time()) - self.started_at, 3)
+                if self.started_at
+                else None
+            ),
+        }
 
 
 class FlashLoad(PamirSerial):
-    def __init__(self, serialport=None, timeout=1.0):
+    def __init__(
+        self,
+        serialport=None,
+        timeout=1.0,
+        framing: Literal["auto", "ascii", "binary"] = "auto",  # page transfer framing
+        journal_file: str = FLASH_JOURNAL_FILE,  # checkpoints for resume_flash_operation
+        bitstream_cache: BitstreamCache = None,  # parsed bitstreams, BITSTREAM_CACHE by default
+        retries: int = FLASH_RETRIES,  # attempts after a failed command, 0 fails at once
+    ):
         super().__init__(serialport, timeout)
-        self.bitstream: list[bytes] = []
+        self.serialport = serialport
+        self.device_capabilities: set[str] = None  # probed on first use
+        self.framing = "ascii"
+        self.bitstream = memoryview(b"")  # whole image padded with 0xFF to full pages
+        self.blank_pages: bytes = b""  # 1 for each all-0xFF page of the bitstream
+        self.sector_digests: tuple[int, ...] = ()  # CRC32 per 0xFF padded sector
+        self.bitstream_sha256 = ""  # identifies the image of a journaled write
+        self.journal_file = journal_file
+        self.bitstream_cache = bitstream_cache or BITSTREAM_CACHE
+        self.retries = retries
+        self.retry_counts: dict[str, int] = {}  # retries per kind of the last operation
+        self.bulk_link: dict = None  # rates of a running _bulk_baudrate
         self.operation_thread: Thread = None
         self.events = {
             "progress": Event(),
@@ -38,23 +717,122 @@ class FlashLoad(PamirSerial):
             "abort": Event(),
         }
         self.status_queue = Queue()
+        self.jobs: dict[int, FlashJob] = {}  # jobs of the current job session
+        self.job_heap: list = []  # (priority, job_id) of queued jobs
+        self.job_lock = Lock()
+        self.running_job: FlashJob = None
+        self.job_worker: Thread = None  # thread of the last job session
+        self.job_session_open = False  # the worker still takes queued jobs
+        self.wip_waiter = WipWaiter(self._read_flash_status)
+        self.progress = ProgressPublisher()
+        self.instrument = Instrumentation()
+        if framing == "binary" or (
+            framing == "auto" and "BIN" in self.probe_device_capabilities()
+        ):
+            self.framing = "binary"
+        logging.debug(f"Page transfer framing: {self.framing}")
 
     @staticmethod
-    def read_binary_to_hex(filename, max_bytes=FLASH_PAGE_SIZE) -> dict:
+    def read_binary_file(filename) -> dict:
+        # read the whole file once into a buffer padded with 0xFF to full pages
         return_dict = {"status": True, "msg": None}
-        hex_pages: list[str] = []
-        bin_pages: list[bytes] = []
         try:
             with open(filename, "rb") as f:
+                file_size = os.fstat(f.fileno()).st_size
+                padded_size = -(-file_size // FLASH_PAGE_SIZE) * FLASH_PAGE_SIZE
+                buffer = bytearray(b"\xff") * padded_size
+                if f.readinto(buffer) != file_size:
+                    raise IOError("Short read")
+                return_dict["data"] = buffer
+                return return_dict
+        except FileNotFoundError:
+            return_dict["status"] = False
+            return_dict["msg"] = "Error: File not found"
+        except Exception as e:
+            return_dict["status"] = False
+            return_dict["msg"] = f"Error: {str(e)}"
+        return return_dict
+
+    @staticmethod
+    def read_bit_file(filename, fpga_type: str) -> dict:
+        # skip the .bit header and decode the configuration data in chunks
+        return_dict = {"status": True, "msg": None}
+        builder = BitstreamBuilder(fpga_type)
+        try:
+            with open(filename, "rb") as f:
+
+                def read(size: int) -> bytes:
+                    data = f.read(size)
+                    if len(data) != size:
+                        raise ValueError("Truncated .bit header")
+                    return data
+
+                read(int.from_bytes(read(2), "big"))  # magic
+                read(2)  # length of the first field key
                 while True:
-                    data = f.read(max_bytes)
-                    if not data:
+                    key = read(1)
+                    if key == BIT_FILE_DATA_FIELD:
+                        data_size = int.from_bytes(read(4), "big")
                         break
-                    bin_pages.append(data)
-                    hex_pages.append(data.hex())
-                return_dict["data"] = hex_pages
-                return_dict["bin_data"] = bin_pages
-                return return_dict
+                    if key not in BIT_FILE_TEXT_FIELDS:
+                        raise ValueError(f"Unknown .bit header field {key!r}")
+                    field = read(int.from_bytes(read(2), "big")).rstrip(b"\0")
+                    logging.debug(f".bit field {key.decode()}: {field.decode(errors='replace')}")
+                offset = 0
+                while offset < data_size:
+                    chunk = f.read(min(IMAGE_FILE_CHUNK_SIZE, data_size - offset))
+                    if not chunk:
+                        raise ValueError("Truncated .bit configuration data")
+                    builder.write(offset, chunk)
+                    offset += len(chunk)
+            return_dict.update(builder.finish())
+        except FileNotFoundError:
+            return_dict["status"] = False
+            return_dict["msg"] = "Error: File not found"
+        except Exception as e:
+            return_dict["status"] = False
+            return_dict["msg"] = f"Error: {str(e)}"
+        return return_dict
+
+    @staticmethod
+    def read_mcs_file(filename, fpga_type: str) -> dict:
+        # decode the Intel HEX records line by line, the image starts at the
+        # sector of the first data record
+        return_dict = {"status": True, "msg": None}
+        builder = BitstreamBuilder(fpga_type)
+        try:
+            with open(filename, "r") as f:
+                base = 0  # extended linear or segment address
+                origin = None
+                for line_number, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    if not line.startswith(":"):
+                        raise ValueError(f"Line {line_number}: not an Intel HEX record")
+                    record = bytes.fromhex(line[1:])
+                    if len(record) < 5 or len(record) != record[0] + 5:
+                        raise ValueError(f"Line {line_number}: wrong record length")
+                    if sum(record) & 0xFF:
+                        raise ValueError(f"Line {line_number}: checksum mismatch")
+                    record_type = record[3]
+                    if record_type == MCS_RECORD_DATA:
+                        address = base + int.from_bytes(record[1:3], "big")
+                        if origin is None:
+                            # leading blank data may be left out of the file
+                            origin = address & ~(FLASH_SECTOR_SIZE - 1)
+                        if address < origin:
+                            raise ValueError(
+                                f"Line {line_number}: address {address:#x} before the image start {origin:#x}"
+                            )
+                        builder.write(address - origin, record[4:-1])
+                    elif record_type == MCS_RECORD_EOF:
+                        break
+                    elif record_type == MCS_RECORD_LINEAR_ADDRESS:
+                        base = int.from_bytes(record[4:6], "big") << 16
+                    elif record_type == MCS_RECORD_SEGMENT_ADDRESS:
+                        base = int.from_bytes(record[4:6], "big") << 4
+            return_dict.update(builder.finish())
         except FileNotFoundError:
             return_dict["status"] = False
             return_dict["msg"] = "Error: File not found"
@@ -83,45 +861,865 @@ class FlashLoad(PamirSerial):
         if not os.path.isfile(file_name):
             return {"status": False, "msg": "Error: File not found."}
 
-        # check size of the file
+        # check size of the file, the size of decoded .bit and .mcs images is
+        # checked while decoding
+        ext = ext.lower()
         file_size = os.path.getsize(file_name)
-        if file_size > IMAGE_MAX_SIZE_BYTES:
+        if ext == ".bin" and file_size > IMAGE_MAX_SIZE_BYTES:
             return {
                 "status": False,
                 "msg": f"Error: File too large ({file_size} bytes). Max allowed is {IMAGE_MAX_SIZE_BYTES} bytes.",
             }
 
-        return_dict = self.read_binary_to_hex(file_name)
-        if not return_dict["status"]:
-            return return_dict
+        # unchanged files are taken from the cache without reading them again
+        cache_key = self.bitstream_cache.file_key(file_name, fpga_type)
+        entry = self.bitstream_cache.get(cache_key)
+        if entry is None:
+            if ext == ".bit":
+                return_dict = self.read_bit_file(file_name, fpga_type)
+            elif ext == ".mcs":
+                return_dict = self.read_mcs_file(file_name, fpga_type)
+            else:
+                return_dict = self.read_binary_file(file_name)
+            if not return_dict["status"]:
+                return return_dict
+            buffer: bytearray = return_dict.pop("data")
+            entry = self.bitstream_cache.get_index(cache_key)
+            if entry is None:
+                # decoders of .bit and .mcs files found the header offsets already
+                entry = self.parse_bitstream(
+                    buffer,
+                    fpga_type,
+                    return_dict.get("sync_offset"),
+                    return_dict.get("idcode_offset"),
+                )
+                if not entry.pop("status"):
+                    return {"status": False, "msg": entry["msg"]}
+                del entry["msg"]
+            # read-only view, pages are handed out as slices of it without copying
+            entry["bitstream"] = memoryview(buffer).toreadonly()
+            self.bitstream_cache.put(cache_key, entry)
+        else:
+            logging.debug(f"Bitstream {file_name} taken from the cache")
 
-        return_dict["msg"] = f"Size of the file: {file_size} bytes"
+        self.bitstream = entry["bitstream"]
+        self.blank_pages = entry["blank_pages"]
+        self.sector_digests = entry["sector_digests"]
+        self.bitstream_sha256 = entry["sha256"]
+        page_count = len(self.bitstream) // FLASH_PAGE_SIZE
+        return_dict = {"status": True, "msg": f"Size of the file: {file_size} bytes"}
+        if ext != ".bin":
+            return_dict["msg"] += f", image {len(self.bitstream)} bytes"
         logging.debug(return_dict["msg"])
+        return_dict["msg"] += f", {sum(self.blank_pages)}/{page_count} blank pages"
+        return return_dict
 
-        # check syncronisation code "AA995566" exists, etc.,
-        whole_file_string = "".join(return_dict["data"])
-        if whole_file_string.lower().find(FPGA_BITSTREAM_SYNC_WORD.lower()) == -1:
+    @staticmethod
+    def parse_bitstream(
+        buffer: bytearray,
+        fpga_type: str,
+        sync_offset: int = None,  # offsets found while decoding, searched if None
+        idcode_offset: int = None,
+    ) -> dict:
+        # header check, blank page map and digests of an image padded to full pages
+        return_dict = {"status": True, "msg": None}
+        bitstream = memoryview(buffer)
+        # check syncronisation code "AA995566" exists, etc., as raw bytes
+        if sync_offset is None:
+            sync_offset = buffer.find(bytes.fromhex(FPGA_BITSTREAM_SYNC_WORD))
+        return_dict["sync_offset"] = sync_offset
+        if return_dict["sync_offset"] == -1:
             return {
                 "status": False,
                 "msg": f"Missing synchronisation code {FPGA_BITSTREAM_SYNC_WORD}.",
             }
 
-        if (
-            whole_file_string.lower().find(FPGA_BITSTREAM_IDCODE[fpga_type].lower())
-            == -1
-        ):
+        if idcode_offset is None:
+            idcode_offset = buffer.find(
+                bytes.fromhex(FPGA_BITSTREAM_IDCODE[fpga_type].zfill(8))
+            )
+        return_dict["idcode_offset"] = idcode_offset
+        if return_dict["idcode_offset"] == -1:
             return {
                 "status": False,
                 "msg": f"Missing FPGA id code {FPGA_BITSTREAM_IDCODE[fpga_type]}.",
             }
-        self.bitstream: list[bytes] = return_dict["bin_data"]
+        # page map of blank pages, padding of an incomplete last page is 0xFF as well
+        return_dict["blank_pages"] = bytes(
+            bitstream[offset : offset + FLASH_PAGE_SIZE] == FLASH_BLANK_PAGE
+            for offset in range(0, len(bitstream), FLASH_PAGE_SIZE)
+        )
+        sector_digests = []
+        for offset in range(0, len(bitstream), FLASH_SECTOR_SIZE):
+            sector = bitstream[offset : offset + FLASH_SECTOR_SIZE]
+            crc = zlib.crc32(sector)
+            crc = zlib.crc32(b"\xff" * (FLASH_SECTOR_SIZE - len(sector)), crc)
+            sector_digests.append(crc)
+        return_dict["sector_digests"] = tuple(sector_digests)
+        return_dict["sha256"] = hashlib.sha256(buffer).hexdigest()
+        bitstream.release()
+        return return_dict
+
+    def share_bitstream(self, source: "FlashLoad") -> None:
+        # use the image parsed by another instance, all parts are immutable so
+        # several boards can be programmed from it at the same time
+        self.bitstream = source.bitstream
+        self.blank_pages = source.blank_pages
+        self.sector_digests = source.sector_digests
+        self.bitstream_sha256 = source.bitstream_sha256
+
+    def set_instrumentation(self, enabled: bool = True, trace_file: str = None) -> None:
+        # command latency summary as "timing" in the final status dictionary of
+        # write and read operations, plus a trace of every command in trace_file
+        self.instrument = Instrumentation(enabled, trace_file)
+
+    def _start_phase(self, phase: str, total: int, unit_bytes: int, done: int = 0) -> None:
+        self.progress.start(phase, total, unit_bytes, done)
+        self.instrument.begin_phase(phase)
+
+    def _finish_phase(self) -> None:
+        self.progress.finish()
+        self.instrument.end_phase()
+
+    def _run_instrumented(self, operation, *args) -> dict:
+        self.instrument.reset()
+        return_dict = operation(*args)
+        if self.instrument.enabled:
+            return_dict["timing"] = self.instrument.summary()
+            if self.instrument.trace_file:
+                try:
+                    self.instrument.dump_trace()
+                except Exception as e:
+                    logging.error(f"Trace dump failed: {e}")
+            self.status_queue.put(return_dict.copy())
+        return return_dict
+
+    def _read_flash_status(self) -> int:
+        started = time.perf_counter()
+        status = self.flash_read_status()
+        self.instrument.record("status", time.perf_counter() - started)
+        self.instrument.count("status_polls")
+        return status
+
+    def _device_query(self, command: str) -> str:
+        # send a single line command and return the single line reply
+        self.serialport.write(bytes(f"{command}\n", "utf-8"))
+        return self.serialport.readline().decode("utf-8", errors="replace").strip()
+
+    def probe_device_capabilities(self) -> set[str]:
+        if self.device_capabilities is not None:
+            return self.device_capabilities
+        self.device_capabilities = set()
+        if self.serialport is None:
+            return self.device_capabilities
+        try:
+            reply = self._device_query(FLASH_CMD_CAPABILITIES)
+        except Exception as e:
+            logging.debug(f"Capability probe failed: {e}")
+            reply = ""
+        if reply.startswith("CAP"):
+            self.device_capabilities = set(reply.split()[1:])
+        else:
+            # older firmware, drop whatever it answered to the unknown command
+            self.serialport.reset_input_buffer()
+        logging.debug(f"Device capabilities: {sorted(self.device_capabilities)}")
+        return self.device_capabilities
+
+    def read_sector_digest(self, sector_addr: int) -> int:
+        # CRC32 of a 64 KiB sector, computed by the MicroBlaze if supported,
+        # otherwise by reading the sector back page by page
+        if "CRC" in self.probe_device_capabilities():
+            return self._with_retries("crc", self._device_sector_crc, sector_addr)
+        data = self._read_sector_burst(sector_addr)
+        if data is not None:
+            return zlib.crc32(data)
+        crc = 0
+        for read_addr in range(
+            sector_addr, sector_addr + FLASH_SECTOR_SIZE, FLASH_PAGE_SIZE
+        ):
+            crc = zlib.crc32(self._with_retries("read", self._read_page, read_addr), crc)
+        return crc
+
+    def _read_sector_burst(self, sector_addr: int) -> bytes:
+        # a whole sector in one burst read, None without "BURST" or when the
+        # burst failed and the caller should read the sector page by page
+        if "BURST" not in self.device_capabilities:
+            return None
+        try:
+            return self._read_pages(sector_addr, FLASH_MAX_BURST_PAGES)
+        except Exception as e:
+            if not self.retries:
+                raise
+            # a glitch then costs one page instead of the whole sector
+            logging.debug(f"Sector read falls back to pages after: {e}")
+            self._count_retry("read")
+            self._try_resync_link()
+            return None
+
+    def _device_sector_crc(self, sector_addr: int) -> int:
+        started = time.perf_counter()
+        reply = self._device_query(f"{FLASH_CMD_SECTOR_CRC} 0x{sector_addr:08X}")
+        self.instrument.record("crc", time.perf_counter() - started, sector_addr)
+        fields = reply.split()
+        if len(fields) != 2 or fields[0] != "CRC":
+            raise ValueError(f"Unexpected sector CRC reply: {reply!r}")
+        return int(fields[1], 16)
+
+    def _receive_frame(self) -> tuple:
+        # (opcode, address, payload) of the next binary frame, None on timeout
+        header = self.serialport.read(FLASH_FRAME_HEADER.size)
+        if not header:
+            return None
+        if len(header) != FLASH_FRAME_HEADER.size or header[0] != FLASH_FRAME_START:
+            raise ValueError(f"Invalid frame header: {header.hex()}")
+        _, opcode, address, length = FLASH_FRAME_HEADER.unpack(header)
+        if length > FLASH_SECTOR_SIZE:
+            raise ValueError(f"Invalid frame length {length}")
+        # a garbled length must not stall the link until the WIP timeout
+        body = self._read_exact(
+            length + 2,
+            FLASH_FRAME_BODY_TIMEOUT_SEC
+            + (length + 2) * 10 / self.serialport.baudrate,  # 8N1
+        )
+        if crc16(body[:-2], crc16(header[1:])) != int.from_bytes(body[-2:], "big"):
+            raise ValueError(f"Frame CRC error at 0x{address:08X}")
+        return opcode, address, body[:-2]
+
+    def _read_exact(self, size: int, timeout: float = FLASH_WIP_TIMEOUT_SEC) -> bytes:
+        # long replies, e.g. bursts, take longer than the port timeout
+        data = bytearray()
+        deadline = time.time() + timeout
+        while len(data) < size:
+            data += self.serialport.read(size - len(data))
+            if len(data) < size and time.time() > deadline:
+                raise TimeoutError("Incomplete reply")
+        return bytes(data)
+
+    def _read_line(self, timeout: float = FLASH_WIP_TIMEOUT_SEC) -> str:
+        line = bytearray()
+        deadline = time.time() + timeout
+        while not line.endswith(b"\n"):
+            line += self.serialport.readline()
+            if not line.endswith(b"\n") and time.time() > deadline:
+                raise TimeoutError("Incomplete reply")
+        return line.decode("utf-8", errors="replace").strip()
+
+    def _write_page(self, write_addr: int, page) -> None:
+        # program one page, the caller waits for WIP
+        started = time.perf_counter()
+        if self.framing != "binary":
+            self.flash_write(write_addr, page)
+        else:
+            self.serialport.write(build_frame(FLASH_FRAME_WRITE, write_addr, page))
+            reply = self._receive_frame()
+            if reply is None or reply[:2] != (FLASH_FRAME_ACK, write_addr):
+                raise ValueError(f"Page write not acknowledged: {reply}")
+        self.instrument.record("program", time.perf_counter() - started, write_addr)
+
+    def _read_page(self, read_addr: int) -> bytes:
+        started = time.perf_counter()
+        if self.framing != "binary":
+            page = bytes(self.flash_read(read_addr))
+        else:
+            self.serialport.write(
+                build_frame(FLASH_FRAME_READ, read_addr, length=FLASH_PAGE_SIZE)
+            )
+            reply = self._receive_frame()
+            if reply is None:
+                raise TimeoutError("No page read reply")
+            if reply[:2] != (FLASH_FRAME_DATA, read_addr) or len(reply[2]) != FLASH_PAGE_SIZE:
+                raise ValueError(f"Unexpected page read reply: {reply[:2]}")
+            page = reply[2]
+        self.instrument.record("read", time.perf_counter() - started, read_addr)
+        return page
+
+    def _read_pages(self, read_addr: int, page_count: int) -> bytes:
+        # consecutive pages with one burst command, page by page for one page
+        if page_count == 1:
+            return self._read_page(read_addr)
+        started = time.perf_counter()
+        data = self._read_burst(read_addr, page_count)
+        self.instrument.record("read_burst", time.perf_counter() - started, read_addr)
+        return data
+
+    def _read_burst(self, read_addr: int, page_count: int) -> bytes:
+        length = page_count * FLASH_PAGE_SIZE
+        if self.framing == "binary":
+            self.serialport.write(build_frame(FLASH_FRAME_BURST_READ, read_addr, length=length))
+            reply = self._receive_frame()
+            if reply is None:
+                raise TimeoutError("No burst read reply")
+            if reply[:2] != (FLASH_FRAME_DATA, read_addr) or len(reply[2]) != length:
+                raise ValueError(f"Unexpected burst read reply: {reply[:2]}")
+            return reply[2]
+        self.serialport.write(
+            bytes(f"{FLASH_CMD_BURST_READ} 0x{read_addr:08X} {page_count}\n", "utf-8")
+        )
+        reply = self._read_line()
+        data = bytes.fromhex(reply[2:]) if reply.startswith("0x") else b""
+        if len(data) != length:
+            raise ValueError(f"Unexpected burst read reply at 0x{read_addr:08X}")
+        return data
+
+    def _send_burst(self, write_addr: int, data, compress: bool = False) -> int:
+        # returns the payload bytes sent, fewer than data when compressed
+        if compress:
+            data = rle_encode(data)
+            if self.framing == "binary":
+                self.serialport.write(build_frame(FLASH_FRAME_PACKED_WRITE, write_addr, data))
+            else:
+                self.serialport.write(
+                    bytes(f"{FLASH_CMD_PACKED_WRITE} 0x{write_addr:08X} 0x{data.hex()}\n", "utf-8")
+                )
+        elif self.framing == "binary":
+            self.serialport.write(build_frame(FLASH_FRAME_BURST_WRITE, write_addr, data))
+        else:
+            self.serialport.write(
+                bytes(f"{FLASH_CMD_BURST_WRITE} 0x{write_addr:08X} 0x{data.hex()}\n", "utf-8")
+            )
+        return len(data)
+
+    def _program_pages(
+        self, write_addr: int, data, in_flight: dict, window_depth: int, compress: bool = False
+    ) -> int:
+        # program consecutive pages of one sector, with a burst or packed
+        # command for more than one page or with compress, pipelined when
+        # window_depth is above 1, returns the payload bytes sent
+        if window_depth > 1:
+            return self._send_pipelined(write_addr, data, in_flight, window_depth, compress)
+        if compress or len(data) > FLASH_PAGE_SIZE:
+            started = time.perf_counter()
+            sent = self._send_burst(write_addr, data, compress)
+            # acknowledged once all pages are programmed
+            deadline = time.time() + FLASH_WIP_TIMEOUT_SEC
+            ack_addr = self._receive_page_ack()
+            while ack_addr is None and time.time() < deadline:
+                self.instrument.count("ack_timeouts")
+                ack_addr = self._receive_page_ack()
+            if ack_addr != write_addr:
+                raise ValueError(f"Burst write not acknowledged: {ack_addr}")
+            self.instrument.record("program_burst", time.perf_counter() - started, write_addr)
+            return sent
+        issued_at = time.time()
+        self._write_page(write_addr, data)
+        replied_at = time.time()
+        self.wip_waiter.wait("program", issued_at)
+        self.instrument.record("wip_wait", time.time() - replied_at, write_addr)
+        return len(data)
+
+    def _send_pipelined(
+        self, write_addr: int, data, in_flight: dict, window_depth: int, compress: bool = False
+    ) -> int:
+        # send a page, burst or packed program command without waiting for its
+        # acknowledgement, block only when window_depth commands are in flight
+        started = time.perf_counter()
+        if compress or len(data) > FLASH_PAGE_SIZE:
+            sent = self._send_burst(write_addr, data, compress)
+        elif self.framing == "binary":
+            self.serialport.write(build_frame(FLASH_FRAME_WRITE, write_addr, data))
+            sent = len(data)
+        else:
+            self.serialport.write(
+                bytes(f"{FLASH_CMD_PAGE_WRITE} 0x{write_addr:08X} 0x{data.hex()}\n", "utf-8")
+            )
+            sent = len(data)
+        in_flight[write_addr] = time.time()
+        self.instrument.record("send", time.perf_counter() - started, write_addr)
+        self._collect_page_acks(in_flight, window_depth - 1)
+        return sent
+
+    def _receive_page_ack(self) -> int:
+        # address of the next page acknowledgement, None on timeout
+        if self.framing == "binary":
+            reply = self._receive_frame()
+            if reply is None:
+                return None
+            if reply[0] != FLASH_FRAME_ACK:
+                raise ValueError(f"Page write not acknowledged at 0x{reply[1]:08X}")
+            return reply[1]
+        line = self.serialport.readline().decode("utf-8", errors="replace").split()
+        if not line:
+            return None
+        if line[0] != "ACK" or len(line) != 2:
+            raise ValueError(f"Unexpected page acknowledgement: {' '.join(line)}")
+        return int(line[1], 16)
+
+    def _collect_page_acks(self, in_flight: dict, max_in_flight: int) -> None:
+        # match acknowledgements already received, wait for more until no more
+        # than max_in_flight page commands are outstanding
+        while in_flight:
+            if len(in_flight) <= max_in_flight and not self.serialport.in_waiting:
+                return
+            ack_addr = self._receive_page_ack()
+            if ack_addr is None:
+                self.instrument.count("ack_timeouts")
+                if time.time() - min(in_flight.values()) > FLASH_WIP_TIMEOUT_SEC:
+                    raise TimeoutError("No page acknowledgement for > 10 s")
+                continue
+            if ack_addr not in in_flight:
+                raise ValueError(f"Unexpected page acknowledgement at 0x{ack_addr:08X}")
+            # from sending the command to its acknowledgement
+            self.instrument.record("ack", time.time() - in_flight.pop(ack_addr), ack_addr)
+
+    def _resync_link(self) -> None:
+        # drop garbled and late replies until the link is quiet, then check
+        # that the MicroBlaze answers again and wait until the flash is idle
+        deadline = time.time() + FLASH_WIP_TIMEOUT_SEC
+        while True:
+            self.serialport.reset_input_buffer()
+            time.sleep(FLASH_RESYNC_QUIET_SEC)
+            if not self.serialport.in_waiting:
+                break
+            if time.time() > deadline:
+                raise TimeoutError("Serial link does not settle")
+        while self._read_flash_status() & 0x01:
+            if time.time() > deadline:
+                raise TimeoutError(f"Flash busy > {FLASH_WIP_TIMEOUT_SEC:.0f} s after resync")
+            time.sleep(FLASH_POLL_INTERVAL_SEC)
+
+    def _with_retries(self, kind: str, operation, *args, repair=None):
+        # run operation, after a failure resync the link and run repair (or
+        # operation again) up to self.retries times with exponential backoff,
+        # the retries are counted per kind in retry_counts
+        for attempt in range(self.retries + 1):
+            try:
+                if attempt and repair is not None:
+                    return repair()
+                return operation(*args)
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                logging.debug(f"{kind} retry {attempt + 1}/{self.retries} after: {e}")
+                self._count_retry(kind)
+                time.sleep(FLASH_RETRY_BACKOFF_SEC * 2**attempt)
+                self._try_resync_link()
+                if attempt + 1 >= FLASH_BAUD_STEP_DOWN_FAILURES:
+                    self._step_down_baudrate()
+
+    def _count_retry(self, kind: str) -> None:
+        self.retry_counts[kind] = self.retry_counts.get(kind, 0) + 1
+        self.instrument.count(f"{kind}_retries")
+
+    def _try_resync_link(self) -> None:
+        # a failed resync shows in the next command
+        try:
+            self._resync_link()
+        except Exception as e:
+            logging.debug(f"Resync failed: {e}")
+
+    def _program_page_checked(self, page_addr: int, page) -> None:
+        # lock-step page program confirmed by reading the page back
+        issued_at = time.time()
+        self._write_page(page_addr, page)
+        self.wip_waiter.wait("program", issued_at)
+        if self._read_page(page_addr) != page:
+            raise ValueError(f"Page 0x{page_addr:08X} differs after programming")
+
+    def _repair_pages(self, start_addr: int, end_addr: int, base_address: int) -> None:
+        # after a failed program command re-read the pages from start_addr to
+        # end_addr and reprogram the ones which differ from the image, each
+        # page is retried on its own
+        page_addr = start_addr
+        while page_addr < end_addr:
+            page_addr = self._with_retries(
+                "page", self._repair_page, page_addr, base_address
+            )
+
+    def _repair_page(self, page_addr: int, base_address: int) -> int:
+        # returns the next page to check, the start of the sector after a
+        # page with bits cleared that the image needs set had its sector erased
+        offset = page_addr - base_address
+        expected = self.bitstream[offset : offset + FLASH_PAGE_SIZE]
+        page = self._with_retries("read", self._read_page, page_addr)
+        if page == expected:
+            return page_addr + FLASH_PAGE_SIZE
+        wanted = int.from_bytes(expected, "big")
+        if int.from_bytes(page, "big") & wanted != wanted:
+            # read again, the reply may have been corrupted on the wire
+            page = self._with_retries("read", self._read_page, page_addr)
+            if page == expected:
+                return page_addr + FLASH_PAGE_SIZE
+            if int.from_bytes(page, "big") & wanted != wanted:
+                return self._erase_for_rewrite(page_addr)
+        # programming can still clear the missing bits
+        self._program_page_checked(page_addr, expected)
+        return page_addr + FLASH_PAGE_SIZE
+
+    def _erase_for_rewrite(self, page_addr: int) -> int:
+        # erase the sector of page_addr, its pages are checked and programmed
+        # again from the start of the sector
+        sector_addr = page_addr & ~(FLASH_SECTOR_SIZE - 1)
+        logging.debug(f"Rewriting sector 0x{sector_addr:08X}")
+        self._with_retries(
+            "erase",
+            lambda: self._confirm_erase(sector_addr, self._erase_sector(sector_addr), None),
+        )
+        return sector_addr
+
+    def _confirmed_read(self, kind: str, read, expected, *args):
+        # read until the result equals expected or two reads agree, a reply
+        # corrupted on the wire rarely repeats itself
+        value = read(*args)
+        for _ in range(self.retries):
+            if value == expected:
+                break
+            self._count_retry(kind)
+            again = read(*args)
+            if again == value:
+                break
+            value = again
+        return value
+
+    def _sector_matches(self, sector_addr: int, base_address: int) -> bool:
+        # compare a sector with the loaded bitstream by the device CRC if
+        # supported, otherwise page by page, sectors beyond the image end are
+        # expected to be blank
+        sector_idx = (sector_addr - base_address) // FLASH_SECTOR_SIZE
+        if "CRC" in self.probe_device_capabilities():
+            expected_crc = (
+                self.sector_digests[sector_idx]
+                if sector_idx < len(self.sector_digests)
+                else FLASH_BLANK_SECTOR_CRC
+            )
+            crc = self._confirmed_read("crc", self.read_sector_digest, expected_crc, sector_addr)
+            return crc == expected_crc
+        data = self._read_sector_burst(sector_addr)
+        offset = sector_addr - base_address
+        for page_offset in range(0, FLASH_SECTOR_SIZE, FLASH_PAGE_SIZE):
+            expected = bytes(
+                self.bitstream[offset + page_offset : offset + page_offset + FLASH_PAGE_SIZE]
+            ).ljust(FLASH_PAGE_SIZE, b"\xff")
+            if data is not None:
+                page = data[page_offset : page_offset + FLASH_PAGE_SIZE]
+            else:
+                page = self._with_retries("read", self._read_page, sector_addr + page_offset)
+            if page != expected and self._confirmed_read(
+                "read",
+                lambda: self._with_retries("read", self._read_page, sector_addr + page_offset),
+                expected,
+            ) != expected:
+                return False
+        return True
+
+    def _compare_sectors(
+        self, return_dict: dict, sectors: list[int], base_address: int, operation: str
+    ) -> list[int]:
+        # sectors whose CRC32 in flash differs from the loaded bitstream,
+        # None if aborted or failed with the error reported in return_dict
+        return_dict["msg"] = f"{operation}: checking {len(sectors)} sectors ..."
+        logging.debug(return_dict["msg"])
+        self.status_queue.put(return_dict.copy())
+        mismatch_sectors = []
+        self._start_phase(operation.lower(), len(sectors), FLASH_SECTOR_SIZE)
+        for idx, sector_addr in enumerate(sectors):
+            self.progress.update(idx, sector_addr)
+            if not self._handle_operation_events(return_dict, operation):
+                return None
+            try:
+                if not self._sector_matches(sector_addr, base_address):
+                    mismatch_sectors.append(sector_addr)
+            except Exception as e:
+                return_dict["status"] = False
+                return_dict["msg"] = f"{operation} error at 0x{sector_addr:08X}, {str(e)}"
+                logging.error(return_dict["msg"])
+                self.status_queue.put(return_dict.copy())
+                return None
+        self._finish_phase()
+        return mismatch_sectors
+
+    def _handle_operation_events(self, return_dict: dict, operation: str) -> bool:
+        # report progress and wait while paused, False if aborted by user
+        if self.events["progress"].is_set():
+            event = self.progress.event()
+            return_dict["msg"] = event.message
+            # only the reported status carries the event, later ones would
+            # repeat an outdated position and rate
+            self.status_queue.put(dict(return_dict, progress=event))
+            self.events["progress"].clear()
+
+        if self.events["pause"].is_set():
+            return_dict["msg"] = f"{operation} operation paused."
+            self.status_queue.put(return_dict.copy())
+            while self.events["pause"].is_set():
+                time.sleep(0.1)
+
+        if self.events["abort"].is_set():
+            return_dict["status"] = False
+            return_dict["msg"] = f"{operation} operation aborted by user."
+            self.status_queue.put(return_dict.copy())
+            return False
+        return True
+
+    @staticmethod
+    def plan_erase_sectors(
+        base_address: int,
+        max_address: int,
+        image_size: int,
+        full_region: bool = False,
+    ) -> list[int]:
+        # sectors covered by image_size bytes, or every sector of the region if full_region
+        if full_region:
+            return list(range(base_address, max_address, FLASH_SECTOR_SIZE))
+        sector_count = -(-image_size // FLASH_SECTOR_SIZE)  # round up
+        end_address = min(base_address + sector_count * FLASH_SECTOR_SIZE, max_address)
+        return list(range(base_address, end_address, FLASH_SECTOR_SIZE))
+
+    def _switch_baudrate(self, baudrate: int) -> bool:
+        # change the rate on both ends and check the link with the test pattern
+        reply = self._device_query(f"{FLASH_CMD_BAUD} {baudrate}")
+        if reply != f"BAUD {baudrate}":
+            return False
+        self.serialport.flush()
+        self.serialport.baudrate = baudrate
+        self.serialport.reset_input_buffer()
+        try:
+            reply = self._device_query(f"{FLASH_CMD_ECHO} {FLASH_BAUD_TEST_PATTERN}")
+        except Exception as e:
+            logging.debug(f"Baud rate test at {baudrate} failed: {e}")
+            reply = ""
+        return reply == f"ECHO {FLASH_BAUD_TEST_PATTERN}"
+
+    def _revert_baudrate(self, original: int) -> None:
+        # firmware falls back to the original rate by itself after a failed
+        # test, end the garbage line it may have received with a newline
+        self.serialport.baudrate = original
+        time.sleep(FLASH_BAUD_REVERT_SEC)
+        self.serialport.write(b"\n")
+        self.serialport.readline()
+        self.serialport.reset_input_buffer()
+
+    def _step_down_baudrate(self) -> None:
+        # a command keeps failing at a raised rate, go on at the next lower
+        # working rate, down to the original one
+        link = self.bulk_link
+        if link is None:
+            return
+        previous = link["current"]
+        while link["lower"]:
+            rate = link["lower"].pop(0)
+            try:
+                switched = self._switch_baudrate(rate)
+            except Exception as e:
+                logging.debug(f"Baud rate step down to {rate} failed: {e}")
+                switched = False
+            if switched:
+                link["current"] = rate
+                break
+            # the firmware falls back to the rate before the failed switch
+            self._revert_baudrate(previous)
+        if link["current"] == previous:
+            return
+        msg = f"Transfer continues at {link['current']} baud after repeated failures at {previous}."
+        logging.debug(msg)
+        self.status_queue.put({"status": True, "msg": msg, "baudrate": link["current"]})
+
+    def _bulk_baudrate_usable(self, image_type: str, burst_pages: int, needs_bitstream: bool) -> bool:
+        # invalid arguments fail the operation at the original rate, without
+        # switching the rate there and back first
+        return (
+            image_type in ["golden", "operation"]
+            and 1 <= burst_pages <= FLASH_MAX_BURST_PAGES
+            and (bool(self.bitstream) or not needs_bitstream)
+        )
+
+    @contextmanager
+    def _bulk_baudrate(self, baudrate: int):
+        # run the enclosed operation at the highest working rate up to baudrate
+        # and restore the original rate afterwards, also on errors and aborts
+        original = getattr(self.serialport, "baudrate", None)
+        if (
+            not baudrate
+            or original is None
+            or baudrate <= original
+            or "BAUD" not in self.probe_device_capabilities()
+        ):
+            yield
+            return
+        candidates = [baudrate] + [
+            rate for rate in FLASH_BAUD_RATES if original < rate < baudrate
+        ]
+        current = original
+        for rate in candidates:
+            if self._switch_baudrate(rate):
+                current = rate
+                break
+            self._revert_baudrate(original)
+        msg = f"Bulk transfer at {current} baud (requested {baudrate})."
+        logging.debug(msg)
+        self.status_queue.put({"status": True, "msg": msg, "baudrate": current})
+        if current != original:
+            self.bulk_link = {
+                "current": current,
+                "lower": [rate for rate in candidates if rate < current] + [original],
+            }
+        try:
+            yield
+        finally:
+            if self.bulk_link is not None:
+                current = self.bulk_link["current"]
+                self.bulk_link = None
+            if current != original and not self._switch_baudrate(original):
+                self._revert_baudrate(original)
+                logging.error(f"Baud rate restore not confirmed, back at {original}")
+
+    def _save_checkpoint(self, checkpoint: dict) -> None:
+        # replace the journal atomically so a crash never leaves a torn checkpoint
+        tmp_file = f"{self.journal_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.journal_file)
+
+    def _load_checkpoint(self) -> dict:
+        try:
+            with open(self.journal_file) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _clear_checkpoint(self) -> None:
+        try:
+            os.remove(self.journal_file)
+        except FileNotFoundError:
+            pass
+
+    def _erase_sector(self, erase_addr: int) -> float:
+        # start a sector erase, returns when it was issued for _confirm_erase
+        issued_at = time.time()
+        self.flash_erase(erase_addr)
+        self.instrument.record("erase", time.time() - issued_at, erase_addr)
+        return issued_at
+
+    def _confirm_erase(self, erase_addr: int, issued_at: float, checkpoint: dict) -> None:
+        # wait until the erase is done and journal it
+        waited_from = time.time()
+        if waited_from - issued_at < self.wip_waiter.expected_sec["erase"]:
+            self.wip_waiter.wait("erase", issued_at)
+        else:
+            # overtaken by later commands, the elapsed time is not the erase time
+            while self._read_flash_status() & 0x01:
+                if time.time() - issued_at > FLASH_WIP_TIMEOUT_SEC:
+                    raise TimeoutError(f"Flash busy > {FLASH_WIP_TIMEOUT_SEC:.0f} s during erase")
+                time.sleep(FLASH_POLL_INTERVAL_SEC)
+        self.instrument.record("wip_wait", time.time() - waited_from, erase_addr)
+        if checkpoint is not None:
+            # a resume re-erases the sectors above the last erased one
+            checkpoint["erased_sector"] = max(
+                erase_addr, checkpoint["erased_sector"] or erase_addr
+            )
+            self._save_checkpoint(checkpoint)
+
+    def _erase_failed(self, return_dict: dict, erase_addr: int, error: Exception) -> dict:
+        return_dict["status"] = False
+        if isinstance(error, TimeoutError):
+            return_dict["msg"] = "Flash stays busy for > 10 s, aborting"
+        else:
+            logging.error(f"Erase failed at {hex(erase_addr)}: {error}")
+            return_dict["msg"] = f"Erase error at 0x{erase_addr:08X}"
+        self.status_queue.put(return_dict.copy())
         return return_dict
 
+    def _plan_write_resume(
+        self, checkpoint: dict, erase_sectors: list[int], base_address: int
+    ) -> tuple[list[int], int]:
+        # sectors to erase and first address to program when resuming a write,
+        # the last programmed sector is re-verified and reprogrammed if it differs
+        erased_sector = checkpoint["erased_sector"]
+        programmed_page = checkpoint["programmed_page"]
+        program_start = base_address
+        # erases are journaled in order once done, with erase_ahead also the
+        # ones beyond the programmed sectors
+        resume_erase = [
+            addr for addr in erase_sectors
+            if erased_sector is None or addr > erased_sector
+        ]
+        if programmed_page is not None:
+            sector_addr = programmed_page & ~(FLASH_SECTOR_SIZE - 1)
+            sector_idx = (sector_addr - base_address) // FLASH_SECTOR_SIZE
+            program_start = sector_addr
+            if self.read_sector_digest(sector_addr) == self.sector_digests[sector_idx]:
+                program_start += FLASH_SECTOR_SIZE
+        # the sector programming stopped in may be partially programmed
+        restart_sector = next(
+            (addr for addr in erase_sectors if addr >= program_start), None
+        )
+        if restart_sector is not None and restart_sector not in resume_erase:
+            resume_erase.insert(0, restart_sector)
+        return resume_erase, program_start
+
     def write_image_to_flash(
         self,
         image_type: Literal["golden", "operation"] = "operation",
+        erase_full_region: bool = False,  # Erase the whole region instead of the image sectors
+        mode: Literal["full", "delta"] = "full",  # "delta" only reflashes sectors that differ
+        window_depth: int = 1,  # Page commands in flight, 1 waits for each page (lock-step)
+        verify: bool = False,  # Compare sector CRCs with the bitstream after writing
+        bulk_baudrate: int = 0,  # Raise the baud rate up to this during the write, 0 keeps it
+        burst_pages: int = 1,  # Consecutive pages per program command, up to a sector
+        erase_ahead: int = 0,  # Sectors erased ahead of programming, 0 erases all first
+        compress: bool = False,  # Send the pages PackBits compressed if the firmware expands them
+        journal: bool = False,  # Persist checkpoints for resume_flash_operation
+    ):
+        checkpoint = None
+        if journal:
+            checkpoint = {
+                "operation": "write",
+                "image_type": image_type,
+                "erase_full_region": erase_full_region,
+                "mode": mode,
+                "window_depth": window_depth,
+                "verify": verify,
+                "bulk_baudrate": bulk_baudrate,
+                "burst_pages": burst_pages,
+                "erase_ahead": erase_ahead,
+                "compress": compress,
+            }
+        if not self._bulk_baudrate_usable(image_type, burst_pages, needs_bitstream=True):
+            bulk_baudrate = 0
+        with self._bulk_baudrate(bulk_baudrate):
+            return self._run_instrumented(
+                self._write_image_to_flash,
+                image_type,
+                erase_full_region,
+                mode,
+                window_depth,
+                verify,
+                burst_pages,
+                erase_ahead,
+                compress,
+                checkpoint,
+            )
+
+    def _write_image_to_flash(
+        self,
+        image_type: Literal["golden", "operation"],
+        erase_full_region: bool,
+        mode: Literal["full", "delta"],
+        window_depth: int,
+        verify: bool,
+        burst_pages: int,
+        erase_ahead: int,
+        compress: bool,
+        checkpoint: dict = None,  # journal entry, holds the progress when resuming
     ):
         return_dict = {"status": True, "msg": None}
+        self.retry_counts = {}
+        if not 1 <= burst_pages <= FLASH_MAX_BURST_PAGES:
+            return_dict["status"] = False
+            return_dict["msg"] = f"Invalid burst_pages. Use 1 to {FLASH_MAX_BURST_PAGES}."
+            self.status_queue.put(return_dict.copy())
+            return return_dict
+        if erase_ahead < 0:
+            return_dict["status"] = False
+            return_dict["msg"] = "Invalid erase_ahead. Use 0 or more sectors."
+            self.status_queue.put(return_dict.copy())
+            return return_dict
+        if mode not in ["full", "delta"]:
+            return_dict["status"] = False
+            return_dict["msg"] = "Invalid mode. Use 'full' or 'delta'."
+            self.status_queue.put(return_dict.copy())
+            return return_dict
         if not self.bitstream:
             return_dict["status"] = False
             return_dict["msg"] = "Valid bitstream is not loaded."
@@ -142,48 +1740,133 @@ class FlashLoad(PamirSerial):
             return return_dict
 
         # Erase loop
-        return_dict["msg"] = "Erasing sectors ..."
-        logging.debug(return_dict["msg"])
-        self.status_queue.put(return_dict.copy())
+        resuming = checkpoint is not None and "erase_sectors" in checkpoint
+        if resuming:
+            erase_sectors = checkpoint["erase_sectors"]
+        else:
+            erase_sectors = self.plan_erase_sectors(
+                base_address,
+                max_address,
+                len(self.bitstream),
+                full_region=erase_full_region,
+            )
+        region_sector_count = IMAGE_MAX_SIZE_BYTES // FLASH_SECTOR_SIZE
+        skipped_sector_count = region_sector_count - len(erase_sectors)
 
-        for erase_addr in range(base_address, max_address, FLASH_SECTOR_SIZE):
-            return_dict["msg"] = f"Erasing sector at 0x{erase_addr:08X}"
+        if mode == "delta" and not resuming:
+            changed_sectors = self._compare_sectors(
+                return_dict, erase_sectors, base_address, "Compare"
+            )
+            if changed_sectors is None:
+                return return_dict
+            return_dict["changed_sectors"] = len(changed_sectors)
+            return_dict["unchanged_sectors"] = len(erase_sectors) - len(changed_sectors)
+            return_dict["msg"] = (
+                f"{len(changed_sectors)} sectors changed, "
+                f"{return_dict['unchanged_sectors']} sectors unchanged."
+            )
             logging.debug(return_dict["msg"])
+            self.status_queue.put(return_dict.copy())
+            skipped_sector_count += return_dict["unchanged_sectors"]
+            erase_sectors = changed_sectors
 
-            if self.events["progress"].is_set():
+        pending_erase = erase_sectors
+        program_start = base_address  # pages below were programmed before a resume
+        try:
+            if resuming:
+                pending_erase, program_start = self._plan_write_resume(
+                    checkpoint, erase_sectors, base_address
+                )
+                return_dict["msg"] = (
+                    f"Resuming write, {len(pending_erase)} sectors to erase, "
+                    f"programming from 0x{program_start:08X}."
+                )
+                logging.debug(return_dict["msg"])
                 self.status_queue.put(return_dict.copy())
-                self.events["progress"].clear()
+            elif checkpoint is not None:
+                checkpoint.update(
+                    image_sha256=self.bitstream_sha256,
+                    erase_sectors=erase_sectors,
+                    erased_sector=None,
+                    programmed_page=None,
+                )
+                self._save_checkpoint(checkpoint)
+        except Exception as e:
+            return_dict["status"] = False
+            return_dict["msg"] = f"Write checkpoint error, {str(e)}"
+            logging.error(return_dict["msg"])
+            self.status_queue.put(return_dict.copy())
+            return return_dict
 
-            if self.events["pause"].is_set():
-                return_dict["msg"] = "Erase operation paused."
-                self.status_queue.put(return_dict.copy())
-                while self.events["pause"].is_set():
-                    time.sleep(0.1)
+        if window_depth > 1 and "PIPE" not in self.probe_device_capabilities():
+            window_depth = 1
+            return_dict["msg"] = "Pipelined writes not supported by firmware, using lock-step writes."
+            logging.debug(return_dict["msg"])
+            self.status_queue.put(return_dict.copy())
+        if burst_pages > 1 and "BURST" not in self.probe_device_capabilities():
+            burst_pages = 1
+            return_dict["msg"] = "Burst writes not supported by firmware, writing page by page."
+            logging.debug(return_dict["msg"])
+            self.status_queue.put(return_dict.copy())
+        if compress and "RLE" not in self.probe_device_capabilities():
+            compress = False
+            return_dict["msg"] = "Compressed writes not supported by firmware, sending pages as they are."
+            logging.debug(return_dict["msg"])
+            self.status_queue.put(return_dict.copy())
+        # pipelining firmware waits for the flash before erasing or programming,
+        # an erase then runs while the following pages are transferred
+        device_waits = "PIPE" in self.probe_device_capabilities()
 
-            if self.events["abort"].is_set():
-                return_dict["status"] = False
-                return_dict["msg"] = "Erase operation aborted by user."
-                self.status_queue.put(return_dict.copy())
-                return return_dict
+        self.wip_waiter.reset_histogram()
+        erase_start = time.time()
+        return_dict["erased_sectors"] = len(pending_erase)
+        return_dict["skipped_sectors"] = skipped_sector_count
+        if erase_ahead:
+            pending_erase = sorted(pending_erase)
+            return_dict["msg"] = (
+                f"Erasing {len(pending_erase)}/{region_sector_count} sectors while writing, "
+                f"{erase_ahead} sectors ahead ..."
+            )
+            logging.debug(return_dict["msg"])
+            self.status_queue.put(return_dict.copy())
+        else:
+            return_dict["msg"] = (
+                f"Erasing {len(pending_erase)}/{region_sector_count} sectors ..."
+            )
+            logging.debug(return_dict["msg"])
+            self.status_queue.put(return_dict.copy())
 
-            try:
-                self.flash_erase(erase_addr)
-                start = time.time()
-                while self.flash_read_status() & 0x01:  # check flash status
-                    if time.time() - start > FLASH_WIP_TIMEOUT_SEC:
-                        raise TimeoutError("Flash busy > 10 s during erase")
-                    time.sleep(FLASH_POLL_INTERVAL_SEC)
-            except TimeoutError:
-                return_dict["status"] = False
-                return_dict["msg"] = "Flash stays busy for > 10 s, aborting"
-                self.status_queue.put(return_dict.copy())
-                return return_dict
-            except Exception as e:
-                logging.error(f"Erase failed at {hex(erase_addr)}: {e}")
-                return_dict["status"] = False
-                return_dict["msg"] = f"Erase error at 0x{erase_addr:08X}"
-                self.status_queue.put(return_dict.copy())
-                return return_dict
+            self._start_phase("erase", len(pending_erase), FLASH_SECTOR_SIZE)
+            for idx, erase_addr in enumerate(pending_erase):
+                self.progress.update(idx, erase_addr)
+                if not self._handle_operation_events(return_dict, "Erase"):
+                    return return_dict
+                try:
+                    self._with_retries(
+                        "erase",
+                        lambda: self._confirm_erase(
+                            erase_addr, self._erase_sector(erase_addr), checkpoint
+                        ),
+                    )
+                except Exception as e:
+                    return self._erase_failed(return_dict, erase_addr, e)
+
+            self._finish_phase()
+            erase_time = time.time() - erase_start
+            # estimate the saving from the measured average time per erased sector
+            erase_time_saved = (
+                erase_time / len(pending_erase) * skipped_sector_count
+                if pending_erase
+                else 0.0
+            )
+            return_dict["erase_time_saved_sec"] = round(erase_time_saved, 3)
+            return_dict["msg"] = (
+                f"Erased {len(pending_erase)} sectors in {erase_time:.1f} s, "
+                f"skipped {skipped_sector_count} sectors "
+                f"(~{erase_time_saved:.1f} s saved)."
+            )
+            logging.debug(return_dict["msg"])
+            self.status_queue.put(return_dict.copy())
 
         # Write loop
         return_dict["msg"] = "Writing data pages..."
@@ -191,25 +1874,73 @@ class FlashLoad(PamirSerial):
         self.status_queue.put(return_dict.copy())
 
         write_addr = base_address
-        for idx, bin_page in enumerate(self.bitstream):
-            return_dict["msg"] = (
-                f"Writing page {idx + 1}/{len(self.bitstream)} at 0x{write_addr:08X}"
-            )
-            logging.debug(return_dict["msg"])
-            if self.events["progress"].is_set():
-                self.status_queue.put(return_dict.copy())
-                self.events["progress"].clear()
+        skipped_pages = 0
+        erased_sector_set = set(erase_sectors)
+        in_flight = {}  # page address -> send time of unacknowledged page commands
+        programmed_pages = 0
+        sent_bytes = 0  # page payload on the serial link, packed with compress
+        run_addr = base_address  # first page of the run of pages to program
+        run_pages = 0
+        first_page_sec = None
+        erase_idx = 0 if erase_ahead else len(pending_erase)  # next erase to issue
+        running_erases = []  # (sector address, issue time) of unconfirmed erases
 
-            if self.events["pause"].is_set():
-                return_dict["msg"] = "Write operation paused."
-                self.status_queue.put(return_dict.copy())
-                while self.events["pause"].is_set():
-                    time.sleep(0.1)
+        def repair_run() -> int:
+            # check every page from the oldest unacknowledged one to the end
+            # of the failed run, returns the payload of the run as sent
+            run_end = run_addr + run_pages * FLASH_PAGE_SIZE
+            self._repair_pages(min(in_flight, default=run_addr), run_end, base_address)
+            in_flight.clear()
+            return run_pages * FLASH_PAGE_SIZE
 
-            if self.events["abort"].is_set():
-                return_dict["status"] = False
-                return_dict["msg"] = "Write operation aborted by user."
-                self.status_queue.put(return_dict.copy())
+        def drain_acks() -> None:
+            # wait for the acknowledgements of all pages sent before write_addr
+            def repair_sent() -> None:
+                self._repair_pages(min(in_flight, default=write_addr), write_addr, base_address)
+                in_flight.clear()
+
+            self._with_retries("page", self._collect_page_acks, in_flight, 0, repair=repair_sent)
+
+        def confirm_erase(erase_addr: int, issued_at: float) -> None:
+            # the erase was acknowledged and the sector may be programmed by
+            # now, a failed status poll is only polled again
+            self._with_retries("erase", self._confirm_erase, erase_addr, issued_at, checkpoint)
+
+        def check_sector(sector_addr: int) -> None:
+            # ASCII page commands carry no checksum, a payload corrupted on
+            # the wire shows in the sector CRC and only the pages that differ
+            # are programmed again, without "CRC" reading the sector back
+            # would double the traffic, verify=True covers that case
+            drain_acks()
+            while running_erases:
+                confirm_erase(*running_erases.pop(0))  # no reads while erasing
+            if self._sector_matches(sector_addr, base_address):
+                return
+            if not self.retries:
+                raise ValueError(f"Sector 0x{sector_addr:08X} differs after programming")
+            self._count_retry("page")
+            sector_end = min(sector_addr + FLASH_SECTOR_SIZE, base_address + len(self.bitstream))
+            self._repair_pages(sector_addr, sector_end, base_address)
+
+        def sector_to_check(sector_addr: int) -> bool:
+            return (
+                self.framing != "binary"
+                and "CRC" in self.device_capabilities
+                and sector_addr in erased_sector_set
+                and sector_addr >= program_start
+            )
+
+        write_start = time.time()
+        page_count = len(self.bitstream) // FLASH_PAGE_SIZE
+        self._start_phase("write", page_count, FLASH_PAGE_SIZE)
+        for idx in range(page_count):
+            self.progress.update(idx, write_addr)
+            if not self._handle_operation_events(return_dict, "Write"):
+                try:
+                    # the pages still in flight are acknowledged after the abort
+                    self._collect_page_acks(in_flight, 0)
+                except Exception:
+                    self.serialport.reset_input_buffer()
                 return return_dict
 
             if write_addr >= max_address:
@@ -218,20 +1949,113 @@ class FlashLoad(PamirSerial):
                 self.status_queue.put(return_dict.copy())
                 return return_dict
 
-            bin_page_list = list(bin_page)
+            if write_addr % FLASH_SECTOR_SIZE == 0 and sector_to_check(
+                write_addr - FLASH_SECTOR_SIZE
+            ):
+                try:
+                    check_sector(write_addr - FLASH_SECTOR_SIZE)
+                except Exception as e:
+                    return_dict["status"] = False
+                    return_dict["msg"] = (
+                        f"Write check error at 0x{write_addr - FLASH_SECTOR_SIZE:08X}, {str(e)}"
+                    )
+                    logging.error(return_dict["msg"])
+                    self.status_queue.put(return_dict.copy())
+                    return return_dict
+
+            if (
+                checkpoint is not None
+                and write_addr % FLASH_SECTOR_SIZE == 0
+                and write_addr - FLASH_SECTOR_SIZE in erased_sector_set
+                and write_addr - FLASH_SECTOR_SIZE >= program_start
+            ):
+                # previous sector done, journal it before touching the next one
+                try:
+                    drain_acks()
+                    checkpoint["programmed_page"] = write_addr - FLASH_PAGE_SIZE
+                    self._save_checkpoint(checkpoint)
+                except Exception as e:
+                    return_dict["status"] = False
+                    return_dict["msg"] = f"Write checkpoint error at 0x{write_addr:08X}, {str(e)}"
+                    logging.error(return_dict["msg"])
+                    self.status_queue.put(return_dict.copy())
+                    return return_dict
+
+            if erase_ahead and write_addr % FLASH_SECTOR_SIZE == 0:
+                # confirm the erases issued at the last sector and erase up to
+                # erase_ahead sectors from here, the erase replies must not
+                # mix with page acknowledgements
+                erase_until = write_addr + erase_ahead * FLASH_SECTOR_SIZE
+                try:
+                    drain_acks()
+                except Exception as e:
+                    return_dict["status"] = False
+                    return_dict["msg"] = f"Write error at 0x{write_addr:08X}, {str(e)}"
+                    logging.error(return_dict["msg"])
+                    self.status_queue.put(return_dict.copy())
+                    return return_dict
+                erase_addr = write_addr
+                try:
+                    while running_erases:
+                        erase_addr, issued_at = running_erases.pop(0)
+                        confirm_erase(erase_addr, issued_at)
+                    while erase_idx < len(pending_erase) and pending_erase[erase_idx] < erase_until:
+                        erase_addr = pending_erase[erase_idx]
+                        issued_at = self._with_retries("erase", self._erase_sector, erase_addr)
+                        erase_idx += 1
+                        if device_waits:
+                            running_erases.append((erase_addr, issued_at))
+                        else:
+                            confirm_erase(erase_addr, issued_at)
+                except Exception as e:
+                    return self._erase_failed(return_dict, erase_addr, e)
 
-            if len(bin_page_list) < FLASH_PAGE_SIZE:
-                bin_page_list += [0xFF] * (
-                    FLASH_PAGE_SIZE - len(bin_page_list)
-                )  # Pad incomplete page
+            if (
+                write_addr < program_start
+                or write_addr & ~(FLASH_SECTOR_SIZE - 1) not in erased_sector_set
+            ):
+                # unchanged sector in delta mode or programmed before a resume
+                write_addr += FLASH_PAGE_SIZE
+                continue
+
+            if self.blank_pages[idx]:
+                # sector already erased, blank page reads 0xFF without programming
+                skipped_pages += 1
+                write_addr += FLASH_PAGE_SIZE
+                continue
+
+            # pages are programmed in runs of up to burst_pages consecutive
+            # pages within a sector, a run of one page is a single page write
+            if not run_pages:
+                run_addr = write_addr
+            run_pages += 1
+            write_addr += FLASH_PAGE_SIZE  # Move to next 256-byte page
+            if (
+                run_pages < burst_pages
+                and idx + 1 < page_count
+                and write_addr % FLASH_SECTOR_SIZE
+                and write_addr < max_address
+                and not self.blank_pages[idx + 1]
+            ):
+                continue
+
+            # view into the loaded image, incomplete last page already padded
+            run_offset = run_addr - base_address
+            run_data = self.bitstream[
+                run_offset : run_offset + run_pages * FLASH_PAGE_SIZE
+            ]
 
             try:
-                self.flash_write(write_addr, bin_page_list)
-                start = time.time()
-                while self.flash_read_status() & 0x01:  # check flash status
-                    if time.time() - start > FLASH_WIP_TIMEOUT_SEC:
-                        raise TimeoutError("Flash busy > 10 s during writing")
-                    time.sleep(FLASH_POLL_INTERVAL_SEC)
+                sent_bytes += self._with_retries(
+                    "page",
+                    self._program_pages,
+                    run_addr,
+                    run_data,
+                    in_flight,
+                    window_depth,
+                    compress,
+                    repair=repair_run,
+                )
             except TimeoutError:
                 return_dict["status"] = False
                 return_dict["msg"] = "Flash stays busy for > 10 s, aborting"
@@ -240,29 +2064,213 @@ class FlashLoad(PamirSerial):
                 return return_dict
             except Exception as e:
                 return_dict["status"] = False
-                return_dict["msg"] = f"Write error at 0x{write_addr:08X}, {str(e)}"
+                return_dict["msg"] = f"Write error at 0x{run_addr:08X}, {str(e)}"
                 logging.error(return_dict["msg"])
                 self.status_queue.put(return_dict.copy())
                 return return_dict
 
-            write_addr += FLASH_PAGE_SIZE  # Move to next 256-byte page
+            programmed_pages += run_pages
+            run_pages = 0
+            if first_page_sec is None:
+                first_page_sec = time.time() - erase_start
+            return_dict["pages_per_sec"] = round(
+                programmed_pages / max(time.time() - write_start, 1e-6), 1
+            )
 
+        try:
+            drain_acks()
+        except Exception as e:
+            return_dict["status"] = False
+            return_dict["msg"] = f"Write error, {len(in_flight)} pages not acknowledged, {str(e)}"
+            logging.error(return_dict["msg"])
+            self.status_queue.put(return_dict.copy())
+            return return_dict
+        last_sector = (write_addr - 1) & ~(FLASH_SECTOR_SIZE - 1)
+        if sector_to_check(last_sector):
+            try:
+                check_sector(last_sector)
+            except Exception as e:
+                return_dict["status"] = False
+                return_dict["msg"] = f"Write check error at 0x{last_sector:08X}, {str(e)}"
+                logging.error(return_dict["msg"])
+                self.status_queue.put(return_dict.copy())
+                return return_dict
+
+        # erases beyond the image, e.g. with erase_full_region
+        erase_addr = None
+        try:
+            for erase_addr, issued_at in running_erases:
+                confirm_erase(erase_addr, issued_at)
+            for erase_addr in pending_erase[erase_idx:]:
+                if not self._handle_operation_events(return_dict, "Erase"):
+                    return return_dict
+                confirm_erase(erase_addr, self._with_retries("erase", self._erase_sector, erase_addr))
+        except Exception as e:
+            return self._erase_failed(return_dict, erase_addr, e)
+        if erase_ahead:
+            # estimated from the typical erase time, the erases overlapped the writes
+            return_dict["erase_time_saved_sec"] = round(
+                self.wip_waiter.expected_sec["erase"] * skipped_sector_count, 3
+            )
+        if first_page_sec is not None:
+            return_dict["first_page_sec"] = round(first_page_sec, 3)
+
+        write_time = max(time.time() - write_start, 1e-6)
+        return_dict["pages_per_sec"] = round(programmed_pages / write_time, 1)
+        return_dict["effective_bytes_per_sec"] = round(
+            programmed_pages * FLASH_PAGE_SIZE / write_time, 1
+        )
+        if compress:
+            return_dict["compression_ratio"] = round(
+                programmed_pages * FLASH_PAGE_SIZE / max(sent_bytes, 1), 3
+            )
+        self._finish_phase()
         self.flash_write_disable()
-        return_dict["msg"] = "Successfully written to flash."
+        if checkpoint is not None:
+            self._clear_checkpoint()
+        return_dict["wip_polls"] = self.wip_waiter.poll_histogram
+        return_dict["skipped_pages"] = skipped_pages
+        return_dict["skipped_bytes"] = skipped_pages * FLASH_PAGE_SIZE
+        return_dict["retries"] = dict(self.retry_counts)
+        return_dict["msg"] = (
+            f"Successfully written to flash, {skipped_pages} blank pages "
+            f"({skipped_pages * FLASH_PAGE_SIZE} bytes) skipped, "
+            f"{return_dict['pages_per_sec']} pages/s"
+        )
+        if compress:
+            return_dict["msg"] += f", compression ratio {return_dict['compression_ratio']}"
+        if self.retry_counts:
+            return_dict["msg"] += f", {sum(self.retry_counts.values())} retries"
+        return_dict["msg"] += "."
+
         logging.debug(return_dict["msg"])
         self.status_queue.put(return_dict.copy())
+        if verify:
+            return self._verify_written_sectors(return_dict, erase_sectors, base_address)
+        return return_dict
+
+    def _verify_written_sectors(
+        self, return_dict: dict, sectors: list[int], base_address: int
+    ) -> dict:
+        mismatch_sectors = self._compare_sectors(
+            return_dict, sectors, base_address, "Verify"
+        )
+        if mismatch_sectors is None:
+            return return_dict
+        return_dict["verified_sectors"] = len(sectors)
+        return_dict["mismatch_sectors"] = mismatch_sectors
+        return_dict["retries"] = dict(self.retry_counts)
+        if mismatch_sectors:
+            return_dict["status"] = False
+            return_dict["msg"] = (
+                f"Verify failed, {len(mismatch_sectors)}/{len(sectors)} sectors differ: "
+                + ", ".join(f"0x{addr:08X}" for addr in mismatch_sectors)
+            )
+            logging.error(return_dict["msg"])
+        else:
+            return_dict["msg"] = f"Verified {len(sectors)} sectors successfully."
+            logging.debug(return_dict["msg"])
+        self.status_queue.put(return_dict.copy())
         return return_dict
 
+    def verify_image_in_flash(
+        self,
+        image_type: Literal["golden", "operation"] = "operation",
+    ) -> dict:
+        return_dict = {"status": True, "msg": None}
+        self.retry_counts = {}
+        if not self.bitstream:
+            return_dict["status"] = False
+            return_dict["msg"] = "Valid bitstream is not loaded."
+            self.status_queue.put(return_dict.copy())
+            return return_dict
+
+        if image_type == "golden":
+            base_address = FLASH_ADDRBASE_GOLDEN
+        elif image_type == "operation":
+            base_address = FLASH_ADDRBASE_OPERATION
+        else:
+            return_dict["status"] = False
+            return_dict["msg"] = "Invalid image_type. Use 'golden' or 'operation'."
+            self.status_queue.put(return_dict.copy())
+            return return_dict
+
+        sectors = self.plan_erase_sectors(
+            base_address, base_address + IMAGE_MAX_SIZE_BYTES, len(self.bitstream)
+        )
+        return self._verify_written_sectors(return_dict, sectors, base_address)
+
     def read_image_from_flash(
         self,
         image_type: Literal["golden", "operation"],
         length: int = 0,  # Length in bytes, 0 means maximum image size
+        output: Union[str, BinaryIO, bytearray, memoryview] = None,  # File name, writable file or buffer
+        until_image_end: bool = False,  # Stop at the bitstream end or at blank sectors
+        blank_sectors_to_stop: int = 2,  # Consecutive blank sectors ending the image
+        bulk_baudrate: int = 0,  # Raise the baud rate up to this during the read, 0 keeps it
+        burst_pages: int = 1,  # Consecutive pages per read command, up to a sector
+        journal: bool = False,  # Persist checkpoints for resume_flash_operation, file output only
+    ):
+        checkpoint = None
+        if journal and isinstance(output, str):
+            checkpoint = {
+                "operation": "read",
+                "image_type": image_type,
+                "length": length,
+                "output": os.path.abspath(output),
+                "until_image_end": until_image_end,
+                "blank_sectors_to_stop": blank_sectors_to_stop,
+                "bulk_baudrate": bulk_baudrate,
+                "burst_pages": burst_pages,
+            }
+        elif journal:
+            logging.debug("Read journal needs a file name output, read not resumable.")
+        if not self._bulk_baudrate_usable(image_type, burst_pages, needs_bitstream=False):
+            bulk_baudrate = 0
+        with self._bulk_baudrate(bulk_baudrate):
+            return self._run_instrumented(
+                self._read_image_from_flash,
+                image_type,
+                length,
+                output,
+                until_image_end,
+                blank_sectors_to_stop,
+                burst_pages,
+                checkpoint,
+            )
+
+    def _read_image_from_flash(
+        self,
+        image_type: Literal["golden", "operation"],
+        length: int,
+        output: Union[str, BinaryIO, bytearray, memoryview],
+        until_image_end: bool,
+        blank_sectors_to_stop: int,
+        burst_pages: int,
+        checkpoint: dict = None,  # journal entry, holds the progress when resuming
     ):
         return_dict = {"status": True, "msg": None}
+        self.retry_counts = {}
+        if not 1 <= burst_pages <= FLASH_MAX_BURST_PAGES:
+            return_dict["status"] = False
+            return_dict["msg"] = f"Invalid burst_pages. Use 1 to {FLASH_MAX_BURST_PAGES}."
+            self.status_queue.put(return_dict.copy())
+            return return_dict
+        if until_image_end and blank_sectors_to_stop < 1:
+            return_dict["status"] = False
+            return_dict["msg"] = "Invalid blank_sectors_to_stop. Use 1 or more."
+            self.status_queue.put(return_dict.copy())
+            return return_dict
+        if burst_pages > 1 and "BURST" not in self.probe_device_capabilities():
+            burst_pages = 1
+            return_dict["msg"] = "Burst reads not supported by firmware, reading page by page."
+            logging.debug(return_dict["msg"])
+            self.status_queue.put(return_dict.copy())
         read_length = (
             length if IMAGE_MAX_SIZE_BYTES > length > 0 else IMAGE_MAX_SIZE_BYTES
         )
-        if (read_length % FLASH_PAGE_SIZE) != 0:
+        if (read_length % FLASH_PAGE_SIZE) != 0 and output is None:
+            # a file or caller buffer gets exactly read_length bytes
             return_dict["msg"] = "Read flash length rounded up to full pages."
             logging.debug(return_dict["msg"])
             self.status_queue.put(return_dict.copy())
@@ -287,60 +2295,207 @@ class FlashLoad(PamirSerial):
             self.status_queue.put(return_dict.copy())
             return return_dict
 
+        page_count = -(-read_length // FLASH_PAGE_SIZE)
+        # pages go to a preallocated buffer, or are streamed to a file or a
+        # caller-supplied buffer so memory use does not grow with the length
+        stream: BinaryIO = None
+        buffer: bytearray = None
+        view: memoryview = None
+        resume_bytes = 0  # stored in the output file before a resume
+        try:
+            if output is None:
+                buffer = bytearray(page_count * FLASH_PAGE_SIZE)
+                view = memoryview(buffer)
+            elif checkpoint is not None and "bytes_read" in checkpoint:
+                # continue the output file from the last checkpoint
+                resume_bytes = checkpoint["bytes_read"]
+                stream = open(output, "r+b")
+                stream.truncate(resume_bytes)
+                stream.seek(resume_bytes)
+            elif isinstance(output, str):
+                stream = open(output, "wb")
+            elif hasattr(output, "write"):
+                stream = output
+            else:
+                view = memoryview(output).cast("B")
+                if view.readonly or len(view) < read_length:
+                    raise ValueError(f"Output buffer must be writable and hold {read_length} bytes")
+        except Exception as e:
+            return_dict["status"] = False
+            return_dict["msg"] = f"Read output error, {str(e)}"
+            logging.error(return_dict["msg"])
+            self.status_queue.put(return_dict.copy())
+            return return_dict
+
         return_dict["msg"] = "Reading flash pages..."
         logging.debug(return_dict["msg"])
         self.status_queue.put(return_dict.copy())
 
-        read_addr = base_address
-        list_byte: list[int] = []
+        read_addr = base_address + resume_bytes
+        bytes_read = resume_bytes
+        # with until_image_end blank pages are only stored once a non-blank page
+        # follows them, so blank sectors after the image are dropped
+        end_finder = BitstreamEndFinder() if until_image_end else None
+        pending_blank_bytes = 0
+        chunk = b""  # pages of the last burst read not processed yet
+        chunk_offset = 0
+        if end_finder is not None and resume_bytes:
+            # restore the parser state from the pages read before the resume
+            with open(output, "rb") as f:
+                for data in iter(lambda: f.read(FLASH_SECTOR_SIZE), b""):
+                    image_end = end_finder.feed(data)
+                    if image_end is not None:
+                        return_dict["image_length"] = image_end
+                        max_address = min(
+                            max_address,
+                            base_address
+                            + -(-image_end // FLASH_PAGE_SIZE) * FLASH_PAGE_SIZE,
+                        )
 
-        idx = 0
-        while read_addr < max_address:
-            return_dict["msg"] = (
-                f"Reading page {idx + 1}/{read_length // FLASH_PAGE_SIZE} at 0x{read_addr:08X}"
-            )
+        def store(data) -> None:
+            nonlocal bytes_read
+            if output is not None:
+                data = data[: read_length - bytes_read]  # the last page is partial
+            if stream is not None:
+                stream.write(data)
+            else:
+                view[bytes_read : bytes_read + len(data)] = data
+            bytes_read += len(data)
 
-            logging.debug(return_dict["msg"])
-            if self.events["progress"].is_set():
-                self.status_queue.put(return_dict.copy())
-                self.events["progress"].clear()
+        idx = resume_bytes // FLASH_PAGE_SIZE
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        self._start_phase("read", page_count, FLASH_PAGE_SIZE, done=idx)
+        try:
+            while read_addr < max_address:
+                self.progress.update(idx, read_addr)
+                if not self._handle_operation_events(return_dict, "Read"):
+                    return return_dict
 
-            if self.events["pause"].is_set():
-                return_dict["msg"] = "Read operation paused."
-                self.status_queue.put(return_dict.copy())
-                while self.events["pause"].is_set():
-                    time.sleep(0.1)
+                if checkpoint is not None and read_addr % FLASH_SECTOR_SIZE == 0:
+                    # journal what is safely in the output file once per sector
+                    try:
+                        stream.flush()
+                        os.fsync(stream.fileno())
+                        checkpoint["bytes_read"] = bytes_read
+                        self._save_checkpoint(checkpoint)
+                    except Exception as e:
+                        return_dict = {
+                            "status": False,
+                            "msg": f"Read checkpoint error at {hex(read_addr)}, {str(e)}",
+                        }
+                        logging.error(return_dict["msg"])
+                        self.status_queue.put(return_dict.copy())
+                        return return_dict
 
-            if self.events["abort"].is_set():
-                return_dict["status"] = False
-                return_dict["msg"] = "Read operation aborted by user."
-                self.status_queue.put(return_dict.copy())
-                return return_dict
+                try:
+                    if chunk_offset >= len(chunk):
+                        chunk = self._with_retries(
+                            "read",
+                            self._read_pages,
+                            read_addr,
+                            min(burst_pages, -(-(max_address - read_addr) // FLASH_PAGE_SIZE)),
+                        )
+                        chunk_offset = 0
+                    page = chunk[chunk_offset : chunk_offset + FLASH_PAGE_SIZE]
+                    chunk_offset += FLASH_PAGE_SIZE
+                    if debug:
+                        logging.debug(
+                            f"Read 256B page from 0x{read_addr:08X}, 0x{page.hex()}"
+                        )  # print the address and data
+                    if end_finder is None:
+                        store(page)
+                    elif page == FLASH_BLANK_PAGE:
+                        pending_blank_bytes += len(page)
+                    else:
+                        if pending_blank_bytes:
+                            store(b"\xff" * pending_blank_bytes)
+                            pending_blank_bytes = 0
+                        store(page)
+                except Exception as e:
+                    logging.error(f" Read failed at 0x{read_addr:08X}: {e}")
+                    return_dict = {
+                        "status": False,
+                        "msg": f"Read error at {hex(read_addr)}",
+                    }
+                    self.status_queue.put(return_dict.copy())
+                    return return_dict
 
-            try:
-                page = self.flash_read(read_addr)
-                list_byte.extend(page)
-                str_hex_page = "".join(f"{b:02x}" for b in page)
-                logging.debug(
-                    f"Read 256B page from 0x{read_addr:08X}, 0x{str_hex_page}"
-                )  # print the address and data
-            except Exception as e:
-                logging.error(f" Read failed at 0x{read_addr:08X}: {e}")
-                return {"status": False, "msg": f"Read error at {hex(read_addr)}"}
+                read_addr += FLASH_PAGE_SIZE
+                idx += 1
 
-            read_addr += FLASH_PAGE_SIZE
-            idx += 1
-        return_dict["msg"] = f"Read {len(list_byte)} bytes from flash successfully."
+                if end_finder is not None:
+                    image_end = end_finder.feed(page)
+                    if image_end is not None and "image_length" not in return_dict:
+                        return_dict["image_length"] = image_end
+                        max_address = min(
+                            max_address,
+                            base_address
+                            + -(-image_end // FLASH_PAGE_SIZE) * FLASH_PAGE_SIZE,
+                        )
+                        self.progress.total = (max_address - base_address) // FLASH_PAGE_SIZE
+                    # blank sectors end the image only where no packet is being
+                    # parsed, inside one they may be part of its payload
+                    if (
+                        end_finder.state in ["sync", "invalid"]
+                        and pending_blank_bytes >= blank_sectors_to_stop * FLASH_SECTOR_SIZE
+                    ):
+                        break
+            if pending_blank_bytes and "image_length" in return_dict:
+                # blank pages inside the parsed image are part of it
+                image_pages_end = -(-return_dict["image_length"] // FLASH_PAGE_SIZE)
+                store(
+                    b"\xff"
+                    * min(
+                        pending_blank_bytes,
+                        image_pages_end * FLASH_PAGE_SIZE - bytes_read,
+                    )
+                )
+        finally:
+            if isinstance(output, str) and stream is not None:
+                stream.close()
+        self._finish_phase()
+        if checkpoint is not None:
+            self._clear_checkpoint()
+        if until_image_end:
+            return_dict.setdefault("image_length", bytes_read)
+        return_dict["retries"] = dict(self.retry_counts)
+        return_dict["msg"] = f"Read {bytes_read} bytes from flash successfully"
+        if self.retry_counts:
+            return_dict["msg"] += f", {sum(self.retry_counts.values())} retries"
+        return_dict["msg"] += "."
         logging.debug(return_dict["msg"])
-        return_dict["data"] = list_byte
+        if buffer is not None:
+            view.release()
+            del buffer[bytes_read:]
+            return_dict["data"] = buffer
         self.status_queue.put(return_dict.copy())
         return return_dict
 
+    def save_read_image(
+        self,
+        file_name: str,
+        image_type: Literal["golden", "operation"],
+        length: int = 0,  # Length in bytes, 0 means maximum image size
+    ) -> dict:
+        # read flash straight into a new file
+        if "." not in file_name:
+            return {"status": False, "msg": "No file extension provided."}
+        return self.read_image_from_flash(image_type, length, output=file_name)
+
     def init_flash_operation(
         self,
         image_type: Literal["golden", "operation"],
-        operation_type: Literal["write", "read"],
+        operation_type: Literal["write", "read", "verify"],
         read_length: int = 0,  # Length in bytes for read operation, ignored in write operation
+        erase_full_region: bool = False,  # Erase the whole region in write operation, ignored in read operation
+        write_mode: Literal["full", "delta"] = "full",  # Write operation mode, ignored in read operation
+        window_depth: int = 1,  # Page commands in flight in write operation, ignored in read operation
+        read_output: Union[str, BinaryIO, bytearray, memoryview] = None,  # Read operation output, ignored in write operation
+        verify: bool = False,  # Verify sector CRCs after write operation, ignored in read operation
+        bulk_baudrate: int = 0,  # Raise the baud rate up to this during write or read operation
+        burst_pages: int = 1,  # Consecutive pages per command in write or read operation
+        erase_ahead: int = 0,  # Sectors erased ahead of programming in write operation, 0 erases all first
+        compress: bool = False,  # Send compressed pages in write operation if the firmware supports it
     ):
         if (
             isinstance(self.operation_thread, Thread)
@@ -353,22 +2508,306 @@ class FlashLoad(PamirSerial):
             each_event.clear()
         self.status_queue.queue.clear()  # Clear the status queue before starting a new operation
 
-        if operation_type not in ["write", "read"]:
-            raise ValueError("Invalid operation_type. Use 'write' or 'read'.")
+        if operation_type not in ["write", "read", "verify"]:
+            raise ValueError("Invalid operation_type. Use 'write', 'read' or 'verify'.")
         if operation_type == "write":
             self.operation_thread = Thread(
-                target=self.write_image_to_flash, args=(image_type,), daemon=True
+                target=self.write_image_to_flash,
+                args=(image_type, erase_full_region, write_mode, window_depth, verify),
+                kwargs={
+                    "bulk_baudrate": bulk_baudrate,
+                    "burst_pages": burst_pages,
+                    "erase_ahead": erase_ahead,
+                    "compress": compress,
+                    "journal": True,
+                },
+                daemon=True,
             )
         elif operation_type == "read":
             self.operation_thread = Thread(
                 target=self.read_image_from_flash,
-                args=(image_type, read_length),
+                args=(image_type, read_length, read_output),
+                kwargs={
+                    "bulk_baudrate": bulk_baudrate,
+                    "burst_pages": burst_pages,
+                    "journal": True,
+                },
                 daemon=True,
             )
+        elif operation_type == "verify":
+            self.operation_thread = Thread(
+                target=self.verify_image_in_flash, args=(image_type,), daemon=True
+            )
+        else:
+            raise ValueError("Invalid operation_type. Use 'write', 'read' or 'verify'.")
+        self.operation_thread.start()
+
+    def submit_flash_jobs(
+        self,
+        jobs: list[dict],  # {"operation": "write", "image_type": "golden", "priority": 0, ...}
+        stop_on_failure: bool = True,  # Cancel the queued jobs when one fails or is aborted
+    ) -> list[int]:
+        # queue operations for one worker thread that runs them back to back,
+        # jobs may be added while it runs, returns the job ids
+        prepared = []
+        for job in jobs:
+            options = dict(job)
+            operation = options.pop("operation", None)
+            image_type = options.pop("image_type", "operation")
+            priority = options.pop("priority", 0)
+            if operation not in FLASH_JOB_OPERATIONS:
+                raise ValueError(
+                    f"Invalid operation {operation}. Use {', '.join(FLASH_JOB_OPERATIONS)}."
+                )
+            if image_type not in ["golden", "operation"]:
+                raise ValueError("Invalid image_type. Use 'golden' or 'operation'.")
+            if operation in ["write", "read"]:
+                options.setdefault("journal", True)
+            try:
+                inspect.signature(self._job_function(operation)).bind(image_type, **options)
+            except TypeError as e:
+                raise ValueError(f"Invalid arguments of {operation} job: {str(e)}")
+            prepared.append((operation, image_type, priority, options))
+
+        with self.job_lock:
+            ending_worker = None if self.job_session_open else self.job_worker
+        if ending_worker is not None:
+            ending_worker.join()  # only reports the summary of its job session
+        with self.job_lock:
+            new_session = not self.job_session_open
+            if new_session:
+                if (
+                    isinstance(self.operation_thread, Thread)
+                    and self.operation_thread.is_alive()
+                ):
+                    raise RuntimeError(
+                        "An operation is already in progress. Please check flash operation status."
+                    )
+                self.jobs = {}
+                self.job_heap = []
+                for each_event in self.events.values():
+                    each_event.clear()
+                self.status_queue.queue.clear()
+            job_ids = []
+            for operation, image_type, priority, options in prepared:
+                job = FlashJob(
+                    job_id=len(self.jobs) + 1,
+                    operation=operation,
+                    image_type=image_type,
+                    options=options,
+                    priority=priority,
+                    stop_on_failure=stop_on_failure,
+                    queued_at=time.time(),
+                )
+                self.jobs[job.job_id] = job
+                heapq.heappush(self.job_heap, (priority, job.job_id))
+                job_ids.append(job.job_id)
+            if new_session:
+                self.job_session_open = True
+                self.job_worker = Thread(target=self._run_flash_jobs, daemon=True)
+                self.operation_thread = self.job_worker
+                self.job_worker.start()
+        logging.debug(f"Flash jobs queued: {job_ids}")
+        return job_ids
+
+    def _job_function(self, operation: str):
+        return {
+            "write": self.write_image_to_flash,
+            "read": self.read_image_from_flash,
+            "verify": self.verify_image_in_flash,
+        }[operation]
+
+    def _next_flash_job(self) -> FlashJob:
+        # highest priority queued job, None when the queue is empty
+        while self.job_heap:
+            _, job_id = heapq.heappop(self.job_heap)
+            if self.jobs[job_id].state == "queued":
+                return self.jobs[job_id]
+        return None
+
+    def _cancel_queued_jobs(self, reason: str) -> None:
+        for job in self.jobs.values():
+            if job.state == "queued":
+                job.state = "cancelled"
+                job.result = {"status": False, "msg": reason}
+
+    def _run_flash_jobs(self) -> None:
+        # worker of submit_flash_jobs, the loaded bitstream and the serial
+        # link stay as they are between jobs, so do the status_queue entries
+        while True:
+            with self.job_lock:
+                if self.events["abort"].is_set():
+                    self._cancel_queued_jobs("Cancelled, job session aborted by user.")
+                    self.events["abort"].clear()
+                job = self._next_flash_job()
+                if job is None:
+                    self.job_session_open = False
+                    break
+                job.state = "running"
+                job.started_at = time.time()
+                self.running_job = job
+            name = f"Job {job.job_id} ({job.operation} {job.image_type})"
+            self.status_queue.put(
+                {"status": True, "msg": f"{name} started.", "job_id": job.job_id}
+            )
+            try:
+                result = self._job_function(job.operation)(job.image_type, **job.options)
+            except Exception as e:
+                result = {"status": False, "msg": f"Error: {str(e)}"}
+                logging.error(f"{name} failed: {result['msg']}")
+            with self.job_lock:
+                job.finished_at = time.time()
+                job.result = result
+                self.running_job = None
+                if job.cancel_requested:
+                    # only this job was aborted, also when it finished first
+                    self.events["abort"].clear()
+                if not result["status"] and job.cancel_requested:
+                    job.state = "cancelled"
+                elif not result["status"] and self.events["abort"].is_set():
+                    job.state = "cancelled"  # the queued jobs follow at the next pick
+                elif result["status"]:
+                    job.state = "done"
+                else:
+                    job.state = "failed"
+                if job.state == "failed" and job.stop_on_failure:
+                    self._cancel_queued_jobs(f"Cancelled, job {job.job_id} failed.")
+            self.status_queue.put(
+                {
+                    "status": result["status"],
+                    "msg": f"{name} {job.state} after {job.finished_at - job.started_at:.2f} s.",
+                    "job_id": job.job_id,
+                }
+            )
+        return_dict = self.flash_job_status()
+        if return_dict["status"]:
+            logging.debug(return_dict["msg"])
         else:
-            raise ValueError("Invalid operation_type. Use 'write' or 'read'.")
+            logging.error(return_dict["msg"])
+        self.status_queue.put(return_dict)
+
+    def cancel_flash_job(self, job_id: int) -> bool:
+        # a queued job is dropped, the running job is aborted and the queue
+        # continues with the next one, False if the job already finished
+        with self.job_lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.state not in ["queued", "running"]:
+                return False
+            if job.state == "queued":
+                job.state = "cancelled"
+                job.result = {"status": False, "msg": "Cancelled before start."}
+            else:
+                job.cancel_requested = True
+                self.events["pause"].clear()
+                self.events["abort"].set()
+        logging.debug(f"Flash job {job_id} cancelled.")
+        return True
+
+    def flash_job_status(self) -> dict:
+        # per-job state and timing plus the aggregate of the job session
+        with self.job_lock:
+            summaries = [job.summary() for job in self.jobs.values()]
+            started = [job.started_at for job in self.jobs.values() if job.started_at]
+            finished = [job.finished_at for job in self.jobs.values() if job.finished_at]
+        if not summaries:
+            return {"status": False, "msg": "No flash jobs submitted.", "jobs": []}
+        states = {
+            state: sum(summary["state"] == state for summary in summaries)
+            for state in ["queued", "running", "done", "failed", "cancelled"]
+        }
+        pending = states["queued"] + states["running"]
+        session_end = max(finished) if finished and not pending else time.time()
+        return_dict = {
+            "status": not states["failed"],
+            "msg": (
+                f"{states['done']}/{len(summaries)} jobs done, {states['failed']} failed, "
+                f"{states['cancelled']} cancelled, {pending} pending."
+            ),
+            "finished": not pending,
+            "states": states,
+            "total_sec": round(session_end - min(started), 3) if started else 0.0,
+            "busy_sec": round(sum(summary["run_sec"] or 0 for summary in summaries), 3),
+            "jobs": summaries,
+        }
+        # time between jobs, spent outside of the operations
+        return_dict["idle_sec"] = round(
+            max(return_dict["total_sec"] - return_dict["busy_sec"], 0.0), 3
+        )
+        return return_dict
+
+    def flash_job_result(self, job_id: int) -> dict:
+        # final status dictionary of a finished job, e.g. "data" of a read job
+        with self.job_lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return {"status": False, "msg": f"Unknown flash job {job_id}."}
+            if job.result is None:
+                return {"status": True, "msg": f"Job {job_id} is {job.state}."}
+            return job.result
+
+    def subscribe_progress(self, callback) -> None:
+        # callback(ProgressEvent) at most every FLASH_PROGRESS_INTERVAL_SEC
+        # during an operation, called from the operation thread
+        self.progress.subscribe(callback)
+
+    def unsubscribe_progress(self, callback) -> None:
+        self.progress.unsubscribe(callback)
+
+    def resume_flash_operation(self):
+        # continue the write or read operation recorded in the journal file
+        if (
+            isinstance(self.operation_thread, Thread)
+            and self.operation_thread.is_alive()
+        ):
+            raise RuntimeError(
+                "An operation is already in progress. Please check flash operation status."
+            )
+        checkpoint = self._load_checkpoint()
+        if checkpoint is None:
+            raise RuntimeError("No interrupted flash operation to resume.")
+        if (
+            checkpoint["operation"] == "write"
+            and checkpoint.get("image_sha256", self.bitstream_sha256)
+            != self.bitstream_sha256
+        ):
+            raise ValueError(
+                "Loaded bitstream differs from the interrupted write, load the same file first."
+            )
+        for each_event in self.events.values():
+            each_event.clear()
+        self.status_queue.queue.clear()
+
+        self.operation_thread = Thread(
+            target=self._resume_operation, args=(checkpoint,), daemon=True
+        )
         self.operation_thread.start()
 
+    def _resume_operation(self, checkpoint: dict) -> dict:
+        with self._bulk_baudrate(checkpoint["bulk_baudrate"]):
+            if checkpoint["operation"] == "write":
+                return self._run_instrumented(
+                    self._write_image_to_flash,
+                    checkpoint["image_type"],
+                    checkpoint["erase_full_region"],
+                    checkpoint["mode"],
+                    checkpoint["window_depth"],
+                    checkpoint["verify"],
+                    checkpoint["burst_pages"],
+                    checkpoint.get("erase_ahead", 0),
+                    checkpoint.get("compress", False),
+                    checkpoint,
+                )
+            return self._run_instrumented(
+                self._read_image_from_flash,
+                checkpoint["image_type"],
+                checkpoint["length"],
+                checkpoint["output"],
+                checkpoint["until_image_end"],
+                checkpoint["blank_sectors_to_stop"],
+                checkpoint["burst_pages"],
+                checkpoint,
+            )
+
     def flash_operation_status(
         self,
         status_check_timeout: float = 0.5,
@@ -421,37 +2860,3 @@ class FlashLoad(PamirSerial):
             self.events["pause"].clear()
         self.events["abort"].set()
         logging.debug("Flash operation aborted by user.")
-
-    # def save_read_image(
-    #     self,
-    #     file_name: str = None,
-    # ):
-    #     # save in a new file
-    #     # check if extension provided in the file name
-    #     if "." not in file_name:
-    #         return {"status": False, "msg": "No file extension provided."}
-    #     _, ext = os.path.splitext(file_name)
-
-    #     if not os.path.isfile(file_name):
-    #         return {"status": False, "msg": "Error: File not found."}
-
-    #     if save_to_file:
-    #         file_path = f"{self.load_image_type}_read_back.txt"
-    #         try:
-    #             with open(file_path, "w") as f:
-    #                 for page in list_byte:
-    #                     hex_str = "".join(f"{b:02x}" for b in page)
-    #                     f.write(hex_str + "\n")
-    #             print(f"Flash content saved to: {file_path}")
-    #         except Exception as e:
-    #             return {"status": False, "msg": f"Failed to save file: {str(e)}"}
-    #         return {
-    #             "status": True,
-    #             "msg": f"Read {len(list_byte)} pages and saved to {file_path}",
-    #             "data": list_byte,
-    #         }
-    #     return {
-    #         "status": True,
-    #         "msg": f"Read {len(list_byte)} bytes",
-    #         "data": list_byte,
-    #     }
@@ -0,0 +1,177 @@
+import os
+import logging
+from typing import Literal
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from flash_load import FlashLoad
+
+# Programs a rack of boards, each on its own serial port, from one host. The
+# bitstream is loaded and parsed once and shared read-only by the FlashLoad of
+# every board, at most max_concurrent boards are driven at the same time.
+MULTI_MAX_CONCURRENT = 4
+MULTI_JOURNAL_FILE = "flash_load_journal_{board}.json"  # one journal per board
+
+
+class MultiFlashLoad:
+    def __init__(
+        self,
+        serialports: list,  # prepared serial ports, one per board
+        timeout=1.0,
+        framing: Literal["auto", "ascii", "binary"] = "auto",
+        max_concurrent: int = MULTI_MAX_CONCURRENT,  # boards programmed at the same time
+    ):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1.")
+        self.boards: dict[str, FlashLoad] = {}
+        for idx, serialport in enumerate(serialports):
+            # boards are named after their port, e.g. "ttyUSB0"
+            board = os.path.basename(getattr(serialport, "port", None) or f"board{idx}")
+            if board in self.boards:
+                board = f"{board}_{idx}"
+            self.boards[board] = FlashLoad(
+                serialport,
+                timeout,
+                framing=framing,
+                journal_file=MULTI_JOURNAL_FILE.format(board=board),
+            )
+        self.max_concurrent = max_concurrent
+        self.executor: ThreadPoolExecutor = None
+        self.futures: dict[str, Future] = {}
+        self.board_status: dict[str, dict] = {}  # latest status of each board
+
+    def load_bitstream_file(self, file_name: str, fpga_type="XCKU040") -> dict:
+        # parse once, the other boards reference the same immutable image
+        if not self.boards:
+            return {"status": False, "msg": "No boards configured."}
+        first, *others = self.boards.values()
+        return_dict = first.load_bitstream_file(file_name, fpga_type)
+        if return_dict["status"]:
+            for fl in others:
+                fl.share_bitstream(first)
+        return return_dict
+
+    def _is_running(self) -> bool:
+        return any(not future.done() for future in self.futures.values())
+
+    def init_flash_operation(
+        self,
+        image_type: Literal["golden", "operation"],
+        operation_type: Literal["write", "verify"],
+        erase_full_region: bool = False,  # Erase the whole region in write operation
+        write_mode: Literal["full", "delta"] = "full",  # Write operation mode
+        window_depth: int = 1,  # Page commands in flight in write operation
+        verify: bool = False,  # Verify sector CRCs after write operation
+        bulk_baudrate: int = 0,  # Raise the baud rate up to this during write operation
+        burst_pages: int = 1,  # Consecutive pages per command in write operation
+        erase_ahead: int = 0,  # Sectors erased ahead of programming in write operation
+        compress: bool = False,  # Send compressed pages in write operation if supported
+    ):
+        if self._is_running():
+            raise RuntimeError(
+                "An operation is already in progress. Please check flash operation status."
+            )
+        if operation_type not in ["write", "verify"]:
+            raise ValueError("Invalid operation_type. Use 'write' or 'verify'.")
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent, thread_name_prefix="flash"
+        )
+        self.futures = {}
+        self.board_status = {}
+        for board, fl in self.boards.items():
+            for each_event in fl.events.values():
+                each_event.clear()
+            fl.status_queue.queue.clear()
+            self.board_status[board] = {"status": True, "msg": "Waiting for a free slot."}
+            if operation_type == "write":
+                self.futures[board] = self.executor.submit(
+                    fl.write_image_to_flash,
+                    image_type,
+                    erase_full_region,
+                    write_mode,
+                    window_depth,
+                    verify,
+                    bulk_baudrate=bulk_baudrate,
+                    burst_pages=burst_pages,
+                    erase_ahead=erase_ahead,
+                    compress=compress,
+                    journal=True,
+                )
+            else:
+                self.futures[board] = self.executor.submit(
+                    fl.verify_image_in_flash, image_type
+                )
+
+    def _board_result(self, board: str) -> dict:
+        # final status dictionary of a finished board
+        future = self.futures[board]
+        if future.cancelled():
+            return {"status": False, "msg": "Operation cancelled before start."}
+        if future.exception() is not None:
+            return {"status": False, "msg": f"Error: {str(future.exception())}"}
+        return future.result()
+
+    def flash_operation_status(self) -> dict:
+        # aggregate progress plus the latest status of every board
+        if not self.futures:
+            return {"status": False, "msg": "No flash operation running.", "boards": {}}
+        for board, fl in self.boards.items():
+            while not fl.status_queue.empty():
+                self.board_status[board] = fl.status_queue.get()
+            if not self.futures[board].done():
+                # running boards report their progress by the next call
+                fl.events["progress"].set()
+        finished = [board for board, future in self.futures.items() if future.done()]
+        failed = [board for board in finished if not self._board_result(board)["status"]]
+        # combined rate of the boards still running
+        bytes_per_sec = sum(
+            status["progress"].bytes_per_sec
+            for board, status in self.board_status.items()
+            if "progress" in status and not self.futures[board].done()
+        )
+        return {
+            "status": not failed,
+            "msg": (
+                f"{len(finished)}/{len(self.futures)} boards finished, "
+                f"{len(failed)} failed."
+            ),
+            "finished": len(finished) == len(self.futures),
+            "bytes_per_sec": round(bytes_per_sec, 1),
+            "failed_boards": failed,
+            "boards": {board: status.copy() for board, status in self.board_status.items()},
+        }
+
+    def wait_flash_operation(self, timeout: float = None) -> dict[str, dict]:
+        # block until every board is done or timeout, status dictionary per board
+        wait(self.futures.values(), timeout)
+        results = {}
+        for board, future in self.futures.items():
+            if not future.done():
+                results[board] = {"status": True, "msg": "Operation in progress."}
+                continue
+            results[board] = self._board_result(board)
+            if not results[board]["status"]:
+                logging.error(f"{board}: {results[board]['msg']}")
+        return results
+
+    def set_flash_operation_pause(self) -> None:
+        for fl in self.boards.values():
+            fl.set_flash_operation_pause()
+
+    def set_flash_operation_resume(self) -> None:
+        for fl in self.boards.values():
+            fl.set_flash_operation_resume()
+
+    def set_flash_operation_abort(self) -> None:
+        # boards still waiting for a slot are not started at all
+        for future in self.futures.values():
+            future.cancel()
+        for fl in self.boards.values():
+            fl.events["pause"].clear()
+            fl.events["abort"].set()
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
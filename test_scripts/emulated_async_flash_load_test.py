@@ -0,0 +1,86 @@
+import sys
+import os
+import asyncio
+import tempfile
+import logging
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flash_load import FLASH_ADDRBASE_OPERATION
+from flash_emulator import (
+    FakeMicroBlazeSerial,
+    MicroBlazeEmulator,
+    NorFlashModel,
+    make_test_bitstream,
+)
+from async_flash_load import AsyncFlashLoad
+
+# Drives several emulated boards from one event loop with AsyncFlashLoad,
+# the last board is cancelled halfway to show task cancellation.
+BOARD_COUNT = 3
+IMAGE_SIZE = 512 * 1024
+BLANK_RATIO = 0.3
+TIME_SCALE = 0.05
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+
+
+async def program_board(name: str, afl: AsyncFlashLoad) -> dict:
+    task = asyncio.create_task(afl.write_image("operation", verify=True, burst_pages=16))
+    try:
+        async for status in afl.progress():
+            print(f"{name}: {status['msg']}")
+        return await task
+    except asyncio.CancelledError:
+        # cancelling the write task aborts the operation on the board
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        raise
+
+
+async def main():
+    emulators = [
+        MicroBlazeEmulator(NorFlashModel(time_scale=TIME_SCALE)) for _ in range(BOARD_COUNT)
+    ]
+    boards = [
+        AsyncFlashLoad(FakeMicroBlazeSerial(emulator, time_scale=TIME_SCALE), timeout=1)
+        for emulator in emulators
+    ]
+    image = make_test_bitstream(IMAGE_SIZE, BLANK_RATIO)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bitstream_file = os.path.join(tmp_dir, "emulated_operation.bin")
+        with open(bitstream_file, "wb") as f:
+            f.write(image)
+        for afl in boards:
+            load_result = await afl.load_bitstream_file(bitstream_file)
+            print(f"Load: {load_result['status']}, {load_result['msg']}")
+            assert load_result["status"], load_result["msg"]
+
+    tasks = [
+        asyncio.create_task(program_board(f"board{idx}", afl))
+        for idx, afl in enumerate(boards)
+    ]
+    await asyncio.sleep(1.0)
+    tasks[-1].cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for idx, result in enumerate(results):
+        if isinstance(result, asyncio.CancelledError):
+            print(f"board{idx}: cancelled")
+            assert idx == len(boards) - 1, f"board{idx} cancelled"
+            continue
+        assert not isinstance(result, BaseException), f"board{idx}: {result!r}"
+        flash_content = emulators[idx].flash.read(FLASH_ADDRBASE_OPERATION, len(image))
+        print(f"board{idx}: {result['status']}, {result['msg']}, matches: {flash_content == image}")
+        assert result["status"], f"board{idx}: {result['msg']}"
+        assert flash_content == image, f"board{idx}: flash differs from the image"
+    assert isinstance(results[-1], asyncio.CancelledError), "the last board was not cancelled"
+    for afl in boards:
+        afl.close()
+    print("Async checks passed.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,191 @@
+import sys
+import os
+import tempfile
+import logging
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flash_load import (
+    FLASH_ADDRBASE_OPERATION,
+    FLASH_SECTOR_SIZE,
+    FPGA_BITSTREAM_IDCODE,
+    FlashLoad,
+)
+from flash_emulator import (
+    FakeMicroBlazeSerial,
+    MicroBlazeEmulator,
+    NorFlashModel,
+    make_bit_file,
+    make_mcs_file,
+    make_test_bitstream,
+)
+
+# Runs FlashLoad end to end against the simulated MicroBlaze, no board needed.
+# TIME_SCALE 0 runs as fast as possible, 1 takes as long as on the bench.
+IMAGE_SIZE = 1 * 1024 * 1024
+BLANK_RATIO = 0.3
+TIME_SCALE = 0.0
+BULK_BAUDRATE = 3000000
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+
+
+def check_image_formats(fl: FlashLoad, image: bytes, tmp_dir: str) -> None:
+    # the same image as .bin, .bit and .mcs decodes to the same page buffer
+    mcs_records = make_mcs_file(image, address=FLASH_ADDRBASE_OPERATION).splitlines()
+    # records of blank data left out, the gaps are filled with 0xFF
+    sparse_records = [
+        record
+        for record in mcs_records
+        if record[7:9] != "00" or set(record[9:-2]) != {"F"}
+    ]
+    files = {
+        "image.bin": image,
+        "image.bit": make_bit_file(image),
+        "image.mcs": "\n".join(mcs_records).encode(),
+        "sparse.mcs": "\n".join(sparse_records).encode(),
+    }
+    loaded = {}
+    for name, content in files.items():
+        file_name = os.path.join(tmp_dir, name)
+        with open(file_name, "wb") as f:
+            f.write(content)
+        load_result = fl.load_bitstream_file(file_name)
+        print(f"Load {name}: {load_result['status']}, {load_result['msg']}")
+        assert load_result["status"], load_result["msg"]
+        loaded[name] = (bytes(fl.bitstream), fl.blank_pages, fl.sector_digests, fl.bitstream_sha256)
+    print(f"Left out {len(mcs_records) - len(sparse_records)} blank .mcs records")
+    assert len(set(loaded.values())) == 1, "decoded page buffers differ"
+
+    # a record with a wrong checksum and an image of another FPGA are refused
+    bad_record = mcs_records[len(mcs_records) // 2]
+    bad_record = bad_record[:-2] + f"{(int(bad_record[-2:], 16) + 1) & 0xFF:02X}"
+    idcode = bytes.fromhex(FPGA_BITSTREAM_IDCODE["XCKU040"].zfill(8))
+    failures = {
+        "checksum.mcs": "\n".join(
+            mcs_records[: len(mcs_records) // 2] + [bad_record] + mcs_records[len(mcs_records) // 2 + 1 :]
+        ).encode(),
+        "no_idcode.bit": make_bit_file(image.replace(idcode, bytes(4), 1)),
+    }
+    for name, content in failures.items():
+        file_name = os.path.join(tmp_dir, name)
+        with open(file_name, "wb") as f:
+            f.write(content)
+        load_result = fl.load_bitstream_file(file_name)
+        print(f"Load {name}: {load_result['status']}, {load_result['msg']}")
+        assert not load_result["status"]
+
+
+def check_blank_sectors(fl: FlashLoad, image: bytes) -> None:
+    # blank sectors inside the frame data do not end an until_image_end read
+    gapped = bytearray(image)
+    gapped[2 * FLASH_SECTOR_SIZE : 4 * FLASH_SECTOR_SIZE] = b"\xff" * (2 * FLASH_SECTOR_SIZE)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bitstream_file = os.path.join(tmp_dir, "gapped.bin")
+        with open(bitstream_file, "wb") as f:
+            f.write(gapped)
+        assert fl.load_bitstream_file(bitstream_file)["status"]
+    wr = fl.write_image_to_flash("operation")
+    assert wr["status"], wr["msg"]
+    rd = fl.read_image_from_flash("operation", until_image_end=True, blank_sectors_to_stop=1)
+    print(f"Read with blank sectors in the frames: {rd['status']}, image_length {rd.get('image_length')}")
+    assert rd["status"], rd["msg"]
+    assert bytes(rd["data"][: rd["image_length"]]) == bytes(gapped), "read stopped inside the frames"
+    rd = fl.read_image_from_flash("operation", until_image_end=True, blank_sectors_to_stop=0)
+    print(f"Read with blank_sectors_to_stop=0: {rd['status']}, {rd['msg']}")
+    assert not rd["status"]
+
+
+def check_baudrate_step_down(image: bytes) -> None:
+    # the link turns noisy at the raised rate, the write goes on one rate lower
+    emulator = MicroBlazeEmulator(NorFlashModel(time_scale=TIME_SCALE))
+    serial_port = FakeMicroBlazeSerial(
+        emulator, time_scale=TIME_SCALE, glitch_above_baudrate=BULK_BAUDRATE // 2
+    )
+    fl = FlashLoad(serialport=serial_port, timeout=1)
+    wr = fl.write_image_to_flash("operation", bulk_baudrate=BULK_BAUDRATE)
+    assert not wr["status"], wr["msg"]
+    assert not any("baudrate" in status for status in fl.status_queue.queue), "rate raised without a bitstream"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bitstream_file = os.path.join(tmp_dir, "emulated_operation.bin")
+        with open(bitstream_file, "wb") as f:
+            f.write(image)
+        assert fl.load_bitstream_file(bitstream_file)["status"]
+
+    def degrade(event) -> None:
+        if event.phase == "write" and event.address >= FLASH_ADDRBASE_OPERATION + FLASH_SECTOR_SIZE:
+            serial_port.glitch_rate = 0.5
+
+    fl.progress.interval = 0.0
+    fl.subscribe_progress(degrade)
+    original = serial_port.baudrate
+    wr = fl.write_image_to_flash("operation", bulk_baudrate=BULK_BAUDRATE)
+    rates = [status["baudrate"] for status in fl.status_queue.queue if "baudrate" in status]
+    print(f"Write with a degrading link: {wr['status']}, rates {rates}, retries {wr.get('retries')}")
+    assert wr["status"], wr["msg"]
+    assert rates[0] == BULK_BAUDRATE and min(rates) < BULK_BAUDRATE, rates
+    assert serial_port.baudrate == original, "original rate not restored"
+    assert emulator.flash.read(FLASH_ADDRBASE_OPERATION, len(image)) == image, "flash differs from the image"
+
+
+def main():
+    emulator = MicroBlazeEmulator(NorFlashModel(time_scale=TIME_SCALE))
+    serial_port = FakeMicroBlazeSerial(emulator, time_scale=TIME_SCALE)
+    fl = FlashLoad(serialport=serial_port, timeout=1)
+
+    image = make_test_bitstream(IMAGE_SIZE, BLANK_RATIO)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        check_image_formats(fl, image, tmp_dir)
+
+        bitstream_file = os.path.join(tmp_dir, "emulated_operation.bin")
+        with open(bitstream_file, "wb") as f:
+            f.write(image)
+
+        load_result = fl.load_bitstream_file(bitstream_file)
+        print(f"Load: {load_result['status']}, {load_result['msg']}")
+        assert load_result["status"], load_result["msg"]
+
+        wr = fl.write_image_to_flash("operation", verify=True)
+        print(f"Write: {wr['status']}, {wr['msg']}")
+        assert wr["status"], wr["msg"]
+        assert emulator.flash.read(FLASH_ADDRBASE_OPERATION, len(image)) == image, "flash differs from the image"
+
+        rd = fl.read_image_from_flash("operation", until_image_end=True)
+        print(f"Read: {rd['status']}, {rd['msg']}")
+        print(f"Read back matches image: {bytes(rd['data'][: len(image)]) == image}")
+        assert rd["status"], rd["msg"]
+        assert bytes(rd["data"][: len(image)]) == image, "read back differs from the image"
+
+        # a caller buffer of the requested length, not a page multiple
+        buffer = bytearray(513)
+        rd = fl.read_image_from_flash("operation", len(buffer), output=buffer)
+        print(f"Read into a {len(buffer)} byte buffer: {rd['status']}, {rd['msg']}")
+        assert rd["status"], rd["msg"]
+        assert buffer == image[: len(buffer)], "buffer read differs from the image"
+
+        # change one byte in the second sector and reflash only what differs
+        changed = bytearray(image)
+        changed[0x10000 + 100] ^= 0xFF
+        with open(bitstream_file, "wb") as f:
+            f.write(changed)
+        assert fl.load_bitstream_file(bitstream_file)["status"]
+        wr = fl.write_image_to_flash("operation", mode="delta", verify=True)
+        print(f"Delta write: {wr['status']}, {wr['msg']}")
+        print(f"Changed sectors: {wr.get('changed_sectors')}")
+        assert wr["status"], wr["msg"]
+        assert wr.get("changed_sectors") == 1, "delta write touched other sectors"
+
+    flash_content = emulator.flash.read(FLASH_ADDRBASE_OPERATION, len(changed))
+    print(f"Flash content matches image: {flash_content == bytes(changed)}")
+    assert flash_content == bytes(changed), "flash differs from the changed image"
+    print(f"Serial bytes sent: {serial_port.bytes_written}, received: {serial_port.bytes_read}")
+    check_blank_sectors(fl, image)
+    check_baudrate_step_down(image)
+    print("Flash load checks passed.")
+
+
+if __name__ == "__main__":
+    main()
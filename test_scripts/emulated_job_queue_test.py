@@ -0,0 +1,109 @@
+import sys
+import os
+import tempfile
+import time
+import logging
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flash_load import FLASH_ADDRBASE_GOLDEN, FLASH_ADDRBASE_OPERATION, FlashLoad
+from flash_emulator import (
+    FakeMicroBlazeSerial,
+    MicroBlazeEmulator,
+    NorFlashModel,
+    make_test_bitstream,
+)
+
+# Runs job sessions of submit_flash_jobs against the simulated MicroBlaze:
+# priorities, cancelling a queued job and cancelling the running job.
+IMAGE_SIZE = 512 * 1024
+BLANK_RATIO = 0.2
+TIME_SCALE = 0.02
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+
+
+def run_session(fl: FlashLoad, jobs: list[dict], **kwargs) -> dict:
+    job_ids = fl.submit_flash_jobs(jobs, **kwargs)
+    print(f"Submitted jobs {job_ids}")
+    while fl.operation_thread is not None:
+        for status in fl.flash_operation_status():
+            if "job_id" in status:
+                print(f"  {status['msg']}")
+        time.sleep(0.05)
+    job_status = fl.flash_job_status()
+    print(f"  {job_status['msg']} total {job_status['total_sec']} s, idle {job_status['idle_sec']} s")
+    return job_status
+
+
+def main():
+    emulator = MicroBlazeEmulator(NorFlashModel(time_scale=TIME_SCALE))
+    serial_port = FakeMicroBlazeSerial(emulator, time_scale=TIME_SCALE)
+    fl = FlashLoad(serialport=serial_port, timeout=1)
+
+    image = make_test_bitstream(IMAGE_SIZE, BLANK_RATIO)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bitstream_file = os.path.join(tmp_dir, "emulated_jobs.bin")
+        with open(bitstream_file, "wb") as f:
+            f.write(image)
+        load_result = fl.load_bitstream_file(bitstream_file)
+        print(f"Load: {load_result['status']}, {load_result['msg']}")
+
+    # maintenance session, the operation image goes first by priority
+    job_status = run_session(
+        fl,
+        [
+            {"operation": "write", "image_type": "golden", "burst_pages": 16, "priority": 1},
+            {"operation": "verify", "image_type": "golden", "priority": 1},
+            {"operation": "write", "image_type": "operation", "burst_pages": 16},
+            {"operation": "verify", "image_type": "operation"},
+        ],
+    )
+    assert job_status["states"]["done"] == 4, job_status["msg"]
+    started = sorted(job_status["jobs"], key=lambda job: job["wait_sec"])
+    assert [job["job_id"] for job in started] == [3, 4, 1, 2], started
+    for base_address in [FLASH_ADDRBASE_GOLDEN, FLASH_ADDRBASE_OPERATION]:
+        assert emulator.flash.read(base_address, len(image)) == image
+
+    # cancel a queued job, the others still run
+    job_ids = fl.submit_flash_jobs(
+        [{"operation": "verify"}, {"operation": "verify"}, {"operation": "verify"}]
+    )
+    assert fl.cancel_flash_job(job_ids[1])
+    fl.job_worker.join()
+    states = [job["state"] for job in fl.flash_job_status()["jobs"]]
+    print(f"Queued cancel: {states}")
+    assert states == ["done", "cancelled", "done"], states
+
+    # cancel the running job while it writes, the queue goes on with the next
+    job_ids = fl.submit_flash_jobs(
+        [{"operation": "write", "image_type": "operation"}, {"operation": "verify", "image_type": "golden"}]
+    )
+    time.sleep(0.3)
+    assert fl.cancel_flash_job(job_ids[0])
+    fl.job_worker.join()
+    states = [job["state"] for job in fl.flash_job_status()["jobs"]]
+    print(f"Running cancel: {states}")
+    assert states == ["cancelled", "done"], states
+
+    # cancel the running job when it has no abort check left, it completes
+    # and only that job is affected, golden is intact after the aborted write
+    def cancel_at_end(event) -> None:
+        if event.phase == "verify" and event.done >= event.total and fl.running_job:
+            fl.cancel_flash_job(fl.running_job.job_id)
+
+    fl.subscribe_progress(cancel_at_end)
+    fl.submit_flash_jobs([{"operation": "verify", "image_type": "golden"}] * 3)
+    fl.job_worker.join()
+    fl.unsubscribe_progress(cancel_at_end)
+    states = [job["state"] for job in fl.flash_job_status()["jobs"]]
+    print(f"Late cancel: {states}")
+    assert states == ["done", "done", "done"], states
+    print("Job queue checks passed.")
+
+
+if __name__ == "__main__":
+    main()
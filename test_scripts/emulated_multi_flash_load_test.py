@@ -0,0 +1,73 @@
+import sys
+import os
+import tempfile
+import time
+import logging
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flash_load import FLASH_ADDRBASE_OPERATION
+from flash_emulator import (
+    FakeMicroBlazeSerial,
+    MicroBlazeEmulator,
+    NorFlashModel,
+    make_test_bitstream,
+)
+from multi_flash_load import MultiFlashLoad
+
+# Programs several emulated boards concurrently from one parsed bitstream.
+BOARD_COUNT = 6
+MAX_CONCURRENT = 3
+IMAGE_SIZE = 1 * 1024 * 1024
+BLANK_RATIO = 0.3
+TIME_SCALE = 0.02
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+
+
+def main():
+    emulators = [
+        MicroBlazeEmulator(NorFlashModel(time_scale=TIME_SCALE)) for _ in range(BOARD_COUNT)
+    ]
+    serial_ports = [
+        FakeMicroBlazeSerial(emulator, time_scale=TIME_SCALE) for emulator in emulators
+    ]
+    mfl = MultiFlashLoad(serial_ports, timeout=1, max_concurrent=MAX_CONCURRENT)
+
+    image = make_test_bitstream(IMAGE_SIZE, BLANK_RATIO)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bitstream_file = os.path.join(tmp_dir, "emulated_operation.bin")
+        with open(bitstream_file, "wb") as f:
+            f.write(image)
+        load_result = mfl.load_bitstream_file(bitstream_file)
+        print(f"Load: {load_result['status']}, {load_result['msg']}")
+        assert load_result["status"], load_result["msg"]
+
+    tic = time.time()
+    mfl.init_flash_operation("operation", "write", verify=True, burst_pages=16)
+    while True:
+        status = mfl.flash_operation_status()
+        print(status["msg"])
+        for board, board_status in status["boards"].items():
+            print(f"  {board}: {board_status['msg']}")
+        if status["finished"]:
+            break
+        time.sleep(1)
+    print(f"All boards done in {time.time() - tic:.1f} s")
+
+    for board, result in mfl.wait_flash_operation().items():
+        print(f"{board}: {result['status']}, {result['msg']}")
+        assert result["status"], f"{board}: {result['msg']}"
+    for idx, emulator in enumerate(emulators):
+        flash_content = emulator.flash.read(FLASH_ADDRBASE_OPERATION, len(image))
+        print(f"Board {idx} flash content matches image: {flash_content == image}")
+        assert flash_content == image, f"board {idx}: flash differs from the image"
+    mfl.close()
+    print("Multi board checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import sys
+import os
+import tempfile
+import logging
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flash_load import (
+    FLASH_ADDRBASE_OPERATION,
+    FLASH_PAGE_SIZE,
+    FLASH_SECTOR_SIZE,
+    FlashLoad,
+)
+from flash_emulator import (
+    FakeMicroBlazeSerial,
+    MicroBlazeEmulator,
+    NorFlashModel,
+    make_test_bitstream,
+)
+
+# Aborts journaled writes partway, resumes them from a fresh FlashLoad as
+# after a reboot of the host and checks the flash holds the image.
+IMAGE_SIZE = 512 * 1024
+BLANK_RATIO = 0.3
+TIME_SCALE = 0.0
+CASES = [
+    # (name, write arguments, phase and flash address at which to abort)
+    ("lock-step, abort while erasing", {}, "erase", FLASH_ADDRBASE_OPERATION + 3 * FLASH_SECTOR_SIZE),
+    ("lock-step, abort mid sector", {}, "write", FLASH_ADDRBASE_OPERATION + 2 * FLASH_SECTOR_SIZE + 37 * FLASH_PAGE_SIZE),
+    ("pipelined burst, abort mid sector", {"window_depth": 4, "burst_pages": 16}, "write", FLASH_ADDRBASE_OPERATION + 4 * FLASH_SECTOR_SIZE + 100 * FLASH_PAGE_SIZE),
+    ("erase ahead, abort mid sector", {"erase_ahead": 2}, "write", FLASH_ADDRBASE_OPERATION + 3 * FLASH_SECTOR_SIZE + 5 * FLASH_PAGE_SIZE),
+    ("erase ahead, abort at a sector start", {"erase_ahead": 1, "window_depth": 4}, "write", FLASH_ADDRBASE_OPERATION + 5 * FLASH_SECTOR_SIZE),
+]
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+
+
+def new_flash_load(serial_port, journal_file: str, bitstream_file: str) -> FlashLoad:
+    fl = FlashLoad(serialport=serial_port, timeout=1, journal_file=journal_file)
+    load_result = fl.load_bitstream_file(bitstream_file)
+    assert load_result["status"], load_result["msg"]
+    return fl
+
+
+def abort_at(fl: FlashLoad, phase: str, address: int) -> None:
+    # abort as soon as the operation reaches address in phase
+    def check(event) -> None:
+        if event.phase == phase and event.address >= address:
+            fl.events["abort"].set()
+
+    fl.progress.interval = 0.0
+    fl.subscribe_progress(check)
+
+
+def resume(serial_port, journal_file: str, bitstream_file: str) -> dict:
+    # a fresh instance as after a restart of the host
+    fl = new_flash_load(serial_port, journal_file, bitstream_file)
+    fl.resume_flash_operation()
+    fl.operation_thread.join()
+    statuses = fl.flash_operation_status()
+    assert not os.path.exists(journal_file), "journal left after the resumed write"
+    return statuses[-1]
+
+
+def main():
+    image = make_test_bitstream(IMAGE_SIZE, BLANK_RATIO)
+    # changes in three sectors for the delta case
+    changed = bytearray(image)
+    for sector in [1, 3, 6]:
+        for offset in range(100, 300, 7):
+            changed[sector * FLASH_SECTOR_SIZE + offset] ^= 0x5A
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        journal_file = os.path.join(tmp_dir, "journal.json")
+        bitstream_file = os.path.join(tmp_dir, "image.bin")
+        changed_file = os.path.join(tmp_dir, "changed.bin")
+        with open(bitstream_file, "wb") as f:
+            f.write(image)
+        with open(changed_file, "wb") as f:
+            f.write(changed)
+
+        for name, write_args, phase, address in CASES:
+            emulator = MicroBlazeEmulator(NorFlashModel(time_scale=TIME_SCALE))
+            serial_port = FakeMicroBlazeSerial(emulator, time_scale=TIME_SCALE)
+            # old content, the write has to erase it
+            emulator.flash.memory[FLASH_ADDRBASE_OPERATION : FLASH_ADDRBASE_OPERATION + IMAGE_SIZE] = bytes(IMAGE_SIZE)
+
+            fl = new_flash_load(serial_port, journal_file, bitstream_file)
+            abort_at(fl, phase, address)
+            wr = fl.write_image_to_flash("operation", journal=True, **write_args)
+            assert not wr["status"] and "aborted" in wr["msg"], wr["msg"]
+            assert os.path.exists(journal_file), "no journal after the abort"
+
+            final = resume(serial_port, journal_file, bitstream_file)
+            flash_content = emulator.flash.read(FLASH_ADDRBASE_OPERATION, len(image))
+            print(f"{name}: {wr['msg']} -> {final['msg']}, matches {flash_content == image}")
+            assert final["status"], final["msg"]
+            assert flash_content == image, f"{name}: flash differs from the image"
+
+        # delta write of the changed image aborted in its second changed sector
+        emulator = MicroBlazeEmulator(NorFlashModel(time_scale=TIME_SCALE))
+        serial_port = FakeMicroBlazeSerial(emulator, time_scale=TIME_SCALE)
+        fl = new_flash_load(serial_port, journal_file, bitstream_file)
+        assert fl.write_image_to_flash("operation")["status"]
+        fl = new_flash_load(serial_port, journal_file, changed_file)
+        abort_at(fl, "write", FLASH_ADDRBASE_OPERATION + 3 * FLASH_SECTOR_SIZE + 40 * FLASH_PAGE_SIZE)
+        wr = fl.write_image_to_flash("operation", mode="delta", journal=True)
+        assert not wr["status"] and "aborted" in wr["msg"], wr["msg"]
+        final = resume(serial_port, journal_file, changed_file)
+        flash_content = emulator.flash.read(FLASH_ADDRBASE_OPERATION, len(changed))
+        print(f"delta, abort mid sector: {wr['msg']} -> {final['msg']}, matches {flash_content == bytes(changed)}")
+        assert final["status"], final["msg"]
+        assert flash_content == bytes(changed), "delta: flash differs from the image"
+
+        # the journal belongs to the changed image, another one is refused
+        fl = new_flash_load(serial_port, journal_file, changed_file)
+        abort_at(fl, "write", FLASH_ADDRBASE_OPERATION + FLASH_SECTOR_SIZE)
+        fl.write_image_to_flash("operation", journal=True)
+        fl = new_flash_load(serial_port, journal_file, bitstream_file)
+        try:
+            fl.resume_flash_operation()
+            raise AssertionError("resume accepted another bitstream")
+        except ValueError as e:
+            print(f"Other bitstream refused: {e}")
+    print("Resume checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import sys
+import os
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+import logging
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flash_load import BitstreamCache, FlashLoad
+from flash_emulator import (
+    FakeMicroBlazeSerial,
+    MicroBlazeEmulator,
+    NorFlashModel,
+    make_test_bitstream,
+)
+
+# Measures load_bitstream_file, write_image_to_flash and read_image_from_flash
+# against the simulated MicroBlaze. With --time-scale 1 the serial link and the
+# flash take as long as on the bench, smaller values shrink the simulated
+# durations (not the Python overhead) for quicker comparisons.
+BAUD = 230400
+MIB = 1024 * 1024
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+
+
+def reset_peak_rss() -> None:
+    # Linux resets the high-water mark VmHWM, so each step reports its own
+    # peak, elsewhere the peak of the case process so far is reported
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_kib() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # process high-water mark, ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def mean_polls(histogram: dict) -> float:
+    operations = sum(histogram.values())
+    if not operations:
+        return 0.0
+    return sum(polls * count for polls, count in histogram.items()) / operations
+
+
+def run_case(image_size: int, blank_ratio: float, args) -> list[dict]:
+    emulator = MicroBlazeEmulator(
+        NorFlashModel(time_scale=args.time_scale),
+        capabilities=tuple(args.capabilities),
+    )
+    serial_port = FakeMicroBlazeSerial(
+        emulator,
+        baudrate=args.baud,
+        time_scale=args.time_scale,
+        device_thread=args.device_thread,
+    )
+    # no cache, images of earlier steps would count in the peak RSS
+    fl = FlashLoad(serialport=serial_port, timeout=1, bitstream_cache=BitstreamCache(max_bytes=0))
+    fl.set_instrumentation(args.timing)
+    case = {"image_size": image_size, "blank_ratio": blank_ratio}
+    results = []
+
+    def measure(step: str, function, *step_args, **step_kwargs) -> dict:
+        bytes_written, bytes_read = serial_port.bytes_written, serial_port.bytes_read
+        reset_peak_rss()
+        tic = time.perf_counter()
+        return_dict = function(*step_args, **step_kwargs)
+        wall_time = time.perf_counter() - tic
+        serial_bytes = (
+            serial_port.bytes_written - bytes_written + serial_port.bytes_read - bytes_read
+        )
+        result = dict(
+            case,
+            step=step,
+            status=return_dict["status"],
+            wall_time_sec=round(wall_time, 4),
+            bytes_per_sec=round(image_size / wall_time, 1) if wall_time else None,
+            serial_bytes_per_payload_byte=round(serial_bytes / image_size, 3),
+            peak_rss_kib=peak_rss_kib(),
+        )
+        wip_polls = return_dict.get("wip_polls", {})
+        for operation in ["erase", "program"]:
+            result[f"wip_polls_per_{operation}"] = round(
+                mean_polls(wip_polls.get(operation, {})), 2
+            )
+        for key in ["first_page_sec", "compression_ratio"]:
+            if key in return_dict:
+                result[key] = return_dict[key]
+        if "timing" in return_dict:
+            result["timing"] = return_dict["timing"]
+        results.append(result)
+        print(
+            f"{image_size / MIB:5.1f} MiB blank {blank_ratio:4.2f} {step:5s} "
+            f"{result['wall_time_sec']:9.2f} s {result['bytes_per_sec']:12.0f} B/s "
+            f"{result['serial_bytes_per_payload_byte']:6.3f} serial B/B "
+            f"{result['peak_rss_kib']} KiB"
+        )
+        return return_dict
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bitstream_file = os.path.join(tmp_dir, "benchmark.bin")
+        with open(bitstream_file, "wb") as f:
+            f.write(make_test_bitstream(image_size, blank_ratio, zero_ratio=args.zero_ratio))
+        measure("load", fl.load_bitstream_file, bitstream_file)
+        measure(
+            "write",
+            fl.write_image_to_flash,
+            "operation",
+            window_depth=args.window_depth,
+            burst_pages=args.burst_pages,
+            erase_ahead=args.erase_ahead,
+            compress=args.compress,
+        )
+        measure(
+            "read",
+            fl.read_image_from_flash,
+            "operation",
+            image_size,
+            burst_pages=args.burst_pages,
+        )
+    return results
+
+
+def print_comparison(results: list[dict], baseline_file: str) -> None:
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+    key = lambda r: (r["image_size"], r["blank_ratio"], r["step"])
+    previous = {key(r): r for r in baseline["results"]}
+    print(f"Compared with {baseline['revision']} (new / old wall time):")
+    for result in results:
+        if key(result) in previous and previous[key(result)]["wall_time_sec"]:
+            ratio = result["wall_time_sec"] / previous[key(result)]["wall_time_sec"]
+            print(
+                f"{result['image_size'] / MIB:5.1f} MiB blank {result['blank_ratio']:4.2f} "
+                f"{result['step']:5s} {ratio:6.3f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FlashLoad benchmark on the emulator")
+    parser.add_argument("--sizes-mib", type=float, nargs="+", default=[1, 11, 16])
+    parser.add_argument("--blank-ratios", type=float, nargs="+", default=[0.0, 0.3])
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--baud", type=int, default=BAUD)
+    parser.add_argument("--window-depth", type=int, default=1)
+    parser.add_argument("--burst-pages", type=int, default=1)
+    parser.add_argument("--erase-ahead", type=int, default=0)
+    parser.add_argument(
+        "--compress", action="store_true", help="send PackBits compressed pages (RLE)"
+    )
+    parser.add_argument(
+        "--zero-ratio", type=float, default=0.0, help="fraction of zero frame data"
+    )
+    parser.add_argument(
+        "--device-thread",
+        action="store_true",
+        help="emulated firmware handles commands while the host sends",
+    )
+    parser.add_argument(
+        "--capabilities", nargs="*", default=[], help="firmware features, e.g. CRC PIPE"
+    )
+    parser.add_argument(
+        "--timing", action="store_true", help="add per-phase command latency summaries"
+    )
+    parser.add_argument("--output", default="flash_load_benchmark.json")
+    parser.add_argument("--compare", help="results file of an earlier revision")
+    args = parser.parse_args()
+
+    # every case runs in a fresh process, memory of earlier cases does not
+    # count in its peak RSS
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for size_mib in args.sizes_mib:
+        for blank_ratio in args.blank_ratios:
+            with context.Pool(1) as pool:
+                results.extend(pool.apply(run_case, (int(size_mib * MIB), blank_ratio, args)))
+
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "baud": args.baud,
+                "time_scale": args.time_scale,
+                "window_depth": args.window_depth,
+                "burst_pages": args.burst_pages,
+                "erase_ahead": args.erase_ahead,
+                "device_thread": args.device_thread,
+                "compress": args.compress,
+                "zero_ratio": args.zero_ratio,
+                "capabilities": args.capabilities,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Results written to {args.output}")
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()